@@ -0,0 +1,90 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Hashable
+import asyncio
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.model.models.models import Crawl
+
+MISSING = object()
+
+
+class LRUTTLCache:
+    """Least recently used cache whose entries also expire after `ttl`."""
+
+    def __init__(self, maxsize: int, ttl: timedelta):
+        if maxsize < 1:
+            raise ValueError("Cache size must be positive")
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return MISSING
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl.total_seconds(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else None,
+        }
+
+
+class CrawlGeneration:
+    """Tracks finished crawls, so cached results can be dropped when data changes.
+
+    The generation is the number of finished crawls plus the latest finish
+    time. The crawler runs in another process, so the database is checked at
+    most once per `check_interval`.
+    """
+
+    def __init__(self, check_interval: timedelta):
+        self.check_interval = check_interval
+        self.value: tuple[int, datetime | None] | None = None
+        self._checked_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def refresh(self, session: AsyncSession) -> bool:
+        """Returns True when the generation changed since the last check."""
+        if time.monotonic() - self._checked_at < self.check_interval.total_seconds():
+            return False
+        async with self._lock:
+            if (
+                time.monotonic() - self._checked_at
+                < self.check_interval.total_seconds()
+            ):
+                return False
+            stmt = select(func.count(Crawl.finished_at), func.max(Crawl.finished_at))
+            value = tuple((await session.execute(stmt)).one())
+            self._checked_at = time.monotonic()
+            changed, self.value = value != self.value, value
+            return changed
@@ -1,15 +1,41 @@
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from decimal import Decimal
-from typing import AsyncGenerator
-from fastapi import FastAPI, Depends
-from pydantic import BaseModel
-from sqlalchemy import select
+from typing import AsyncGenerator, Literal
+import base64
+import csv
+import io
+import json
+import os
+from fastapi import FastAPI, Depends, Query as QueryParam
+from fastapi.responses import Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+from pydantic import BaseModel, ConfigDict, Field
+from sqlalchemy import Select, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from api_server.cache import MISSING, CrawlGeneration, LRUTTLCache
+from api_server.metrics import CacheCollector, observe_request
 from app.model.models.models import RealEstateRecord
+from app.model.models.views import (
+    FLOORING_BUCKET_SIZE,
+    PRICE_BUCKET_SIZE,
+    price_stats_buckets,
+    price_stats_daily,
+)
 from app.model.session import AsyncSessionLocal
 from fastapi import HTTPException
 
+DEFAULT_PAGE_SIZE = 10  # We have very limited context on the agent, keep it small
+MAX_PAGE_SIZE = 100
+EXPORT_BATCH_SIZE = 1000
+
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL = timedelta(seconds=float(os.getenv("QUERY_CACHE_TTL", "3600")))
+# How often to check whether a crawl finished and the cache must be dropped
+QUERY_CACHE_CHECK_INTERVAL = timedelta(
+    seconds=float(os.getenv("QUERY_CACHE_CHECK_INTERVAL", "30"))
+)
+
 
 class Query(BaseModel):
     title: str | None = None
@@ -20,15 +46,68 @@ class Query(BaseModel):
     flooring_under: float | None = None
     flooring_over: float | None = None
 
+    def has_filters(self) -> bool:
+        filters = self.model_dump(exclude_none=True, include=set(Query.model_fields))
+        return any(filters.values())
+
+
+class PagedQuery(Query):
+    page_size: int = Field(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+    cursor: str | None = None  # next_cursor of the previous page
+
 
 class RealEstateResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
     title: str
     published_at: datetime | None = None
     price: Decimal | None = None
     flooring_m_squared: float | None = None
 
 
+class RealEstatePage(BaseModel):
+    items: list[RealEstateResponse]
+    next_cursor: str | None = None
+
+
+class DailyStatsQuery(BaseModel):
+    currency: str = "CZK"
+    # Days a version was crawled on, not the published_at of its listing
+    day_from: date | None = None
+    day_to: date | None = None
+
+
+class DailyStats(BaseModel):
+    day: date
+    listings: int
+    price_p25: Decimal
+    price_median: Decimal
+    price_p75: Decimal
+    price_p90: Decimal
+    price_per_m2_median: float | None = None
+    price_per_m2_avg: float | None = None
+
+
+class BucketStatsQuery(BaseModel):
+    currency: str = "CZK"
+    dimension: Literal["price", "flooring"] = "price"
+
+
+class BucketStats(BaseModel):
+    bucket_from: Decimal
+    bucket_to: Decimal
+    listings: int
+    price_median: Decimal
+    price_per_m2_median: float | None = None
+
+
 app = FastAPI()
+app.middleware("http")(observe_request)
+
+query_cache = LRUTTLCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
+crawl_generation = CrawlGeneration(QUERY_CACHE_CHECK_INTERVAL)
+REGISTRY.register(CacheCollector(query_cache))
 
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
@@ -36,15 +115,31 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
-@app.post("/query", response_model=list[RealEstateResponse])
-async def query_records(query: Query, session: AsyncSession = Depends(get_session)):
+def encode_cursor(record: RealEstateRecord) -> str:
+    published_at = record.published_at.isoformat() if record.published_at else None
+    payload = json.dumps([published_at, record.id]).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
 
-    if not any(query.model_dump(exclude_none=True).values()):
+def decode_cursor(cursor: str) -> tuple[datetime | None, int]:
+    try:
+        published_at, record_id = json.loads(base64.urlsafe_b64decode(cursor))
+        if published_at is not None:
+            published_at = datetime.fromisoformat(published_at)
+        return published_at, int(record_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=422, detail="Invalid cursor.")
+
+
+def build_query(query: Query, *columns) -> Select:
+    if not query.has_filters():
         raise HTTPException(
             status_code=422, detail="At least one query parameter must be provided."
         )
 
-    stmt = select(RealEstateRecord)
+    # Older versions of a listing are kept for history only; a bare `current`
+    # matches the predicate of the partial indexes, `current IS true` does not
+    stmt = select(*(columns or [RealEstateRecord])).where(RealEstateRecord.current)
 
     if query.title is not None:
         stmt = stmt.where(RealEstateRecord.title.ilike(f"%{query.title}%"))
@@ -60,11 +155,156 @@ async def query_records(query: Query, session: AsyncSession = Depends(get_sessio
         stmt = stmt.where(RealEstateRecord.flooring_m_squared <= query.flooring_under)
     if query.flooring_over is not None:
         stmt = stmt.where(RealEstateRecord.flooring_m_squared >= query.flooring_over)
-    stmt = stmt.limit(
-        10
-    )  # We have very limited context on the agent, so limit it to 10 now
 
+    # Newest first; rows without published_at come last
+    return stmt.order_by(
+        RealEstateRecord.published_at.desc().nulls_last(), RealEstateRecord.id.desc()
+    )
+
+
+def keyset_branches(stmt: Select, cursor: str | None) -> list[Select]:
+    """Statements continuing the (published_at DESC NULLS LAST, id DESC) order.
+
+    They are run one after another until the page is full. Each one is a
+    single range of the published_at index: rows with a published_at come
+    first, then the NULL tail on its own.
+    """
+    if cursor is None:
+        return [stmt]
+    published_at, record_id = decode_cursor(cursor)
+    null_tail = stmt.where(RealEstateRecord.published_at.is_(None))
+    if published_at is None:
+        return [null_tail.where(RealEstateRecord.id < record_id)]
+    key = tuple_(RealEstateRecord.published_at, RealEstateRecord.id)
+    return [stmt.where(key < tuple_(published_at, record_id)), null_tail]
+
+
+@app.post("/query", response_model=RealEstatePage)
+async def query_records(
+    query: PagedQuery, session: AsyncSession = Depends(get_session)
+):
+    if await crawl_generation.refresh(session):
+        query_cache.clear()  # New data arrived
+    cache_key = query.model_dump_json(exclude_none=True)
+    if (page := query_cache.get(cache_key)) is not MISSING:
+        return page
+
+    records = []
+    for stmt in keyset_branches(build_query(query), query.cursor):
+        # One extra row tells if there is more
+        if (missing := query.page_size + 1 - len(records)) <= 0:
+            break
+        records += (await session.execute(stmt.limit(missing))).scalars().all()
+
+    next_cursor = None
+    if len(records) > query.page_size:
+        records = records[: query.page_size]
+        next_cursor = encode_cursor(records[-1])
+    page = RealEstatePage(items=records, next_cursor=next_cursor)
+    query_cache.set(cache_key, page)
+    return page
+
+
+@app.post("/stats/daily", response_model=list[DailyStats])
+async def daily_stats(
+    query: DailyStatsQuery, session: AsyncSession = Depends(get_session)
+):
+    """Prices of listings new or changed each day, as of the last refresh.
+
+    Days are those the crawler stored a new version on, from day_from to day_to
+    inclusive.
+    """
+    stmt = select(price_stats_daily).where(
+        price_stats_daily.c.currency == query.currency
+    )
+    if query.day_from is not None:
+        stmt = stmt.where(price_stats_daily.c.day >= query.day_from)
+    if query.day_to is not None:
+        stmt = stmt.where(price_stats_daily.c.day <= query.day_to)
+    result = await session.execute(stmt.order_by(price_stats_daily.c.day))
+    return [DailyStats(**row) for row in result.mappings()]
+
+
+@app.post("/stats/buckets", response_model=list[BucketStats])
+async def bucket_stats(
+    query: BucketStatsQuery, session: AsyncSession = Depends(get_session)
+):
+    """Current listings by price or flooring bucket, as of the last refresh."""
+    size = PRICE_BUCKET_SIZE if query.dimension == "price" else FLOORING_BUCKET_SIZE
+    stmt = (
+        select(price_stats_buckets)
+        .where(
+            price_stats_buckets.c.currency == query.currency,
+            price_stats_buckets.c.dimension == query.dimension,
+        )
+        .order_by(price_stats_buckets.c.bucket)
+    )
     result = await session.execute(stmt)
-    records = result.scalars().all()
+    return [
+        BucketStats(
+            bucket_from=row.bucket,
+            bucket_to=row.bucket + size,
+            listings=row.listings,
+            price_median=row.price_median,
+            price_per_m2_median=row.price_per_m2_median,
+        )
+        for row in result
+    ]
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {**query_cache.stats(), "generation": crawl_generation.value}
+
+
+@app.get("/metrics")
+async def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+EXPORT_COLUMNS = (
+    RealEstateRecord.id,
+    RealEstateRecord.title,
+    RealEstateRecord.published_at,
+    RealEstateRecord.price,
+    RealEstateRecord.flooring_m_squared,
+)
+
+
+async def export_rows(query: Query, export_format: str) -> AsyncGenerator[str, None]:
+    stmt = build_query(query, *EXPORT_COLUMNS).execution_options(
+        yield_per=EXPORT_BATCH_SIZE
+    )
+    fields = [column.key for column in EXPORT_COLUMNS]
+
+    # The session lives as long as the response streams, not the request handler
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(stmt)
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(fields)
+            async for rows in result.partitions():
+                writer.writerows(rows)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            if header_only := buffer.getvalue():
+                yield header_only
+        else:
+            async for rows in result.partitions():
+                yield "".join(
+                    RealEstateResponse(**dict(zip(fields, row))).model_dump_json()
+                    + "\n"
+                    for row in rows
+                )
+
 
-    return records
+@app.post("/export")
+async def export_records(
+    query: Query,
+    export_format: Literal["ndjson", "csv"] = QueryParam("ndjson", alias="format"),
+):
+    build_query(query)  # Validate before the response starts streaming
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(export_rows(query, export_format), media_type=media_type)
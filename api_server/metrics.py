@@ -0,0 +1,42 @@
+import time
+
+from fastapi import Request
+from prometheus_client import Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from api_server.cache import LRUTTLCache
+
+request_seconds = Histogram(
+    "snatchy_api_request_seconds",
+    "Time to produce a response; streamed bodies are not included",
+    ["method", "route", "status"],
+)
+
+
+async def observe_request(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Route templates, not raw paths, keep the label cardinality bounded
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    request_seconds.labels(request.method, route, response.status_code).observe(
+        time.perf_counter() - start
+    )
+    return response
+
+
+class CacheCollector(Collector):
+    """Exposes the query cache counters at scrape time."""
+
+    def __init__(self, cache: LRUTTLCache):
+        self.cache = cache
+
+    def collect(self):
+        stats = self.cache.stats()
+        yield GaugeMetricFamily(
+            "snatchy_query_cache_entries", "Cached query pages", value=stats["size"]
+        )
+        for name in ("hits", "misses", "evictions"):
+            yield CounterMetricFamily(
+                f"snatchy_query_cache_{name}", f"Query cache {name}", value=stats[name]
+            )
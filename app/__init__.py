@@ -0,0 +1,5 @@
+from dotenv import load_dotenv
+
+# Modules read their settings from the environment when imported, so .env is
+# loaded before any of them, whichever entry point imports them first
+load_dotenv()
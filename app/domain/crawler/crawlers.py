@@ -1,7 +1,15 @@
+from collections import deque
 from contextlib import asynccontextmanager
+from datetime import timedelta
+from typing import AsyncIterator, Callable
 import asyncio
+import logging
 
-from app.domain.crawler.engines import StealthPlaywrightEngine
+from app.domain.crawler.engines import FetchResult, Validators
+from app.domain.crawler.registry import SiteCrawler, crawler_registry
+from app.domain.crawler.throttling import get_domain_throttle
+
+logger = logging.getLogger(__name__)
 
 URL = "https://www.bezrealitky.cz/vyhledat?estateType=BYT&location=exact&offerType=PRODEJ&osm_value=Hlavn%C3%AD+m%C4%9Bsto+Praha%2C+Praha%2C+%C4%8Cesko&regionOsmIds=R435514&currency=CZK&locale=CS"
 
@@ -10,6 +18,9 @@ class Crawler:
     def __init__(self):
         self._url = None
         self._engine = None
+        self._pagination = None
+        self._throttle = None
+        self._validators = None
 
     def set_engine(self, engine):
         if self._engine is not None:
@@ -21,6 +32,22 @@ class Crawler:
             raise ValueError("URL is already set")
         self._url = url
 
+    def set_pagination(self, pagination):
+        if self._pagination is not None:
+            raise ValueError("Pagination is already set")
+        self._pagination = pagination
+
+    def set_throttle(self, throttle):
+        if self._throttle is not None:
+            raise ValueError("Throttle is already set")
+        self._throttle = throttle
+
+    def set_validators(self, validators: Callable[[str], Validators | None]):
+        """Validators to fetch the pages after the first one conditionally with."""
+        if self._validators is not None:
+            raise ValueError("Validators are already set")
+        self._validators = validators
+
     @property
     def is_ready(self):
         return self._engine is not None and self._url is not None
@@ -40,9 +67,95 @@ class Crawler:
                 finally:
                     print("Page context closed")
 
+    async def _fetch(self, url: str, conditional: bool = False) -> FetchResult:
+        validators = None
+        if conditional and self._validators is not None:
+            validators = self._validators(url)
+
+        async def fetch():
+            async with self._engine() as engine:
+                return await engine.fetch(url, validators)
+
+        if self._throttle is None:
+            return await fetch()
+        async with self._throttle.slot(url):
+            result = await fetch()
+        # Blocks slow the domain down for every crawl sharing the throttle
+        self._throttle.record(url, blocked=result.blocked)
+        return result
+
+    async def iter_pages(
+        self, time_budget: timedelta | None = None, prefetch: int = 4
+    ) -> AsyncIterator[FetchResult]:
+        """Yield every results page as soon as it is fetched.
+
+        The first page is fetched to discover the pagination, the remaining
+        pages are then fetched concurrently within the throttle limits. At most
+        `prefetch` pages are fetched ahead of the consumer, so a slow consumer
+        holds back fetching. Pages not fetched within `time_budget` are skipped.
+        """
+        if not self.is_ready:
+            raise ValueError(
+                "Crawler is not ready. Please set engine, parser, and URL before using."
+            )
+
+        loop = asyncio.get_running_loop()
+        deadline = (
+            None if time_budget is None else loop.time() + time_budget.total_seconds()
+        )
+
+        # Never conditional, the pagination is read from the first page
+        first = await self._fetch(self._url)
+        yield first
+        if self._pagination is None:
+            return
+
+        urls = deque(self._pagination.page_urls(self._url, first.html))
+        pending: set[asyncio.Task] = set()
+        try:
+            while urls or pending:
+                while urls and len(pending) < prefetch:
+                    pending.add(
+                        asyncio.create_task(
+                            self._fetch(urls.popleft(), conditional=True)
+                        )
+                    )
+
+                timeout = None if deadline is None else max(deadline - loop.time(), 0)
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    skipped = len(pending) + len(urls)
+                    logger.warning(
+                        f"Crawl time budget exceeded, skipping {skipped} pages"
+                    )
+                    return
+
+                for task in done:
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        logger.error(f"Failed to fetch results page: {e}")
+                        continue
+                    yield result
+        finally:
+            for task in pending:
+                task.cancel()
+
 
-def build_crawler(url: str) -> Crawler:
+def build_crawler(
+    url: str,
+    validators: Callable[[str], Validators | None] | None = None,
+    site: SiteCrawler | None = None,
+) -> Crawler:
+    """Crawler of the URL with the engine and pagination of its site."""
+    site = site or crawler_registry.get(url)
     crawler = Crawler()
     crawler.set_url(url)
-    crawler.set_engine(StealthPlaywrightEngine)
+    crawler.set_engine(site.make_engine())
+    crawler.set_pagination(site.make_pagination())
+    crawler.set_throttle(get_domain_throttle())
+    if validators is not None:
+        crawler.set_validators(validators)
     return crawler
@@ -1,6 +1,138 @@
 from contextlib import asynccontextmanager
-from playwright.async_api import async_playwright
-from playwright_stealth import Stealth
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Callable
+from urllib.parse import urlparse
+import asyncio
+import logging
+import time
+
+import httpx
+
+from app.domain.crawler.pools import BrowserPool, get_browser_pool
+from app.domain.crawler.registry import crawler_registry
+
+logger = logging.getLogger(__name__)
+
+# Statuses anti-bot protections answer with instead of the page
+BLOCKED_STATUSES = frozenset({401, 403, 429, 503})
+# Found only on the captcha and bot challenge pages served instead of the page,
+# unlike e.g. reCAPTCHA, which real pages embed in their contact forms
+CAPTCHA_MARKERS = (
+    "captcha-delivery.com",  # DataDome
+    "_cf_chl_opt",  # Cloudflare challenge
+    "px-captcha",  # PerimeterX
+)
+
+
+@dataclass(frozen=True)
+class PageLoadPolicy:
+    """What a page is allowed to load and when it counts as loaded."""
+
+    # Parsers only need the DOM, skip everything heavy
+    blocked_resource_types: frozenset[str] = frozenset({"image", "media", "font"})
+    # Trackers, ads and maps served from other sites
+    block_third_party_scripts: bool = True
+    # Listings are server rendered, no need to wait for the network to go idle
+    wait_until: str = "domcontentloaded"
+    timeout: timedelta = timedelta(seconds=30)
+
+
+@dataclass(frozen=True)
+class Validators:
+    """Cache validators of a previous response, for conditional requests."""
+
+    etag: str | None = None
+    last_modified: str | None = None
+
+
+@dataclass
+class FetchResult:
+    url: str
+    html: str
+    status: int | None = None
+    bytes_received: int = 0
+    elapsed: float = 0.0  # Seconds from navigation start to content
+    blocked_requests: int = 0
+    engine: str = ""
+    # Seconds per stage: page_lease (waiting for a pooled page, including a
+    # browser launch when the pool has none), navigation (until the response
+    # headers) and content (reading the body)
+    timings: dict[str, float] = field(default_factory=dict)
+    validators: Validators | None = None  # Of this response, if the server sent any
+
+    @property
+    def not_modified(self) -> bool:
+        """The page did not change since the validators sent with the request."""
+        return self.status == 304
+
+    @property
+    def blocked(self) -> bool:
+        """The site refused the request or answered with a captcha."""
+        return self.status in BLOCKED_STATUSES or any(
+            marker in self.html for marker in CAPTCHA_MARKERS
+        )
+
+
+def _site(url: str) -> str:
+    """Domain a page belongs to, e.g. bezrealitky.cz for www.bezrealitky.cz.
+
+    As registered for crawling, its host for other sites. Guessing it from the
+    labels would put unrelated sites together, e.g. under co.uk.
+    """
+    try:
+        return crawler_registry.domain(url)
+    except LookupError:
+        return urlparse(url).hostname or ""
+
+
+def _same_site(url: str, site: str) -> bool:
+    host = urlparse(url).hostname or ""
+    return host == site or host.endswith(f".{site}")
+
+
+@dataclass
+class _PageTracker:
+    """Blocks requests by the policy and sums up the transferred bytes."""
+
+    policy: PageLoadPolicy
+    first_party: str = ""
+    blocked: int = 0
+    bytes_received: int = 0
+    _pending: set = field(default_factory=set)
+
+    async def route(self, route):
+        request = route.request
+        if request.is_navigation_request() and request.frame.parent_frame is None:
+            self.first_party = _site(request.url)
+
+        if request.resource_type in self.policy.blocked_resource_types or (
+            self.policy.block_third_party_scripts
+            and request.resource_type == "script"
+            and not _same_site(request.url, self.first_party)
+        ):
+            self.blocked += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _add_sizes(self, request):
+        try:
+            sizes = await request.sizes()
+            self.bytes_received += (
+                sizes["responseBodySize"] + sizes["responseHeadersSize"]
+            )
+        except Exception:
+            pass  # The page might be closed already
+
+    def on_request_finished(self, request):
+        task = asyncio.create_task(self._add_sizes(request))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def settle(self):
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
 
 
 class StealthPlaywrightEngine:
@@ -8,21 +140,192 @@ class StealthPlaywrightEngine:
         "headless": False,
         "args": ["--headless=new"],
     }
+    load_policy = PageLoadPolicy()
+
+    @classmethod
+    def get_pool(cls) -> BrowserPool:
+        return get_browser_pool(launch_kwargs=cls.launch_kwargs)
 
     async def __aenter__(self):
-        self._stealth = Stealth().use_async(async_playwright())
-        self._playwright = await self._stealth.__aenter__()
-        self._browser = await self._playwright.chromium.launch(**self.launch_kwargs)
+        # Browsers are long-lived and shared, entering only makes sure they run
+        self._pool = self.get_pool()
+        await self._pool.start()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self._stealth.__aexit__(exc_type, exc_val, exc_tb)
+        self._pool = None
+
+    @asynccontextmanager
+    async def _tracked_page(self):
+        async with self._pool.lease() as page:
+            tracker = _PageTracker(self.load_policy)
+            await page.route("**/*", tracker.route)
+            page.on("requestfinished", tracker.on_request_finished)
+            yield page, tracker
 
     @asynccontextmanager
     async def page(self):
-        context = await self._browser.new_context()
-        page = await context.new_page()
-        try:
+        async with self._tracked_page() as (page, _):
             yield page
-        finally:
-            await page.close()
+
+    async def fetch(
+        self, url: str, validators: Validators | None = None
+    ) -> FetchResult:
+        # Validators are ignored, a browser always loads the whole page
+        start = time.perf_counter()
+        async with self._tracked_page() as (page, tracker):
+            leased = time.perf_counter()
+            response = await page.goto(
+                url,
+                wait_until=self.load_policy.wait_until,
+                timeout=self.load_policy.timeout.total_seconds() * 1000,
+            )
+            navigated = time.perf_counter()
+            html = await page.content()
+            loaded = time.perf_counter()
+            await tracker.settle()
+
+        return FetchResult(
+            url=url,
+            html=html,
+            status=response.status if response else None,
+            bytes_received=tracker.bytes_received,
+            elapsed=loaded - leased,
+            blocked_requests=tracker.blocked,
+            engine="browser",
+            timings={
+                "page_lease": leased - start,
+                "navigation": navigated - leased,
+                "content": loaded - navigated,
+            },
+        )
+
+    @classmethod
+    async def shutdown(cls):
+        await cls.get_pool().close()
+
+
+class HttpEngine:
+    """Plain HTTP fetches for pages which are rendered on the server.
+
+    All instances share one client, so connections are kept alive and
+    multiplexed over HTTP/2 across crawls.
+    """
+
+    headers = {
+        "User-Agent": (
+            "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+            "(KHTML, like Gecko) Chrome/143.0.0.0 Safari/537.36"
+        ),
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Language": "cs-CZ,cs;q=0.9,en;q=0.8",
+    }
+    limits = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+    timeout = httpx.Timeout(30.0)
+    _client: httpx.AsyncClient | None = None
+
+    @classmethod
+    def get_client(cls) -> httpx.AsyncClient:
+        if cls._client is None or cls._client.is_closed:
+            cls._client = httpx.AsyncClient(
+                http2=True,
+                headers=cls.headers,
+                limits=cls.limits,
+                timeout=cls.timeout,
+                follow_redirects=True,
+            )
+        return cls._client
+
+    async def __aenter__(self):
+        self._client = self.get_client()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    async def fetch(
+        self, url: str, validators: Validators | None = None
+    ) -> FetchResult:
+        headers = {}
+        if validators is not None and validators.etag:
+            headers["If-None-Match"] = validators.etag
+        if validators is not None and validators.last_modified:
+            headers["If-Modified-Since"] = validators.last_modified
+
+        start = time.perf_counter()
+        async with self._client.stream("GET", url, headers=headers) as response:
+            navigated = time.perf_counter()
+            await response.aread()
+        loaded = time.perf_counter()
+        return FetchResult(
+            url=url,
+            html=response.text,
+            status=response.status_code,
+            bytes_received=response.num_bytes_downloaded,
+            elapsed=loaded - start,
+            engine="http",
+            timings={"navigation": navigated - start, "content": loaded - navigated},
+            validators=Validators(
+                response.headers.get("ETag"), response.headers.get("Last-Modified")
+            ),
+        )
+
+    @classmethod
+    async def shutdown(cls):
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
+
+
+class FallbackEngine:
+    """Tries a cheap HTTP fetch first and renders in a browser only if needed.
+
+    The browser is used when the HTTP response is blocked or `is_complete`
+    says the HTML lacks the data, e.g. because it is rendered client side.
+    """
+
+    primary = HttpEngine
+    fallback = StealthPlaywrightEngine
+
+    def __init__(self, is_complete: Callable[[str], bool] | None = None):
+        self.is_complete = is_complete or (lambda html: True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    @asynccontextmanager
+    async def page(self):
+        async with self.fallback() as engine:
+            async with engine.page() as page:
+                yield page
+
+    async def fetch(
+        self, url: str, validators: Validators | None = None
+    ) -> FetchResult:
+        timings = {}
+        try:
+            async with self.primary() as engine:
+                result = await engine.fetch(url, validators)
+            if result.not_modified or (
+                result.status not in BLOCKED_STATUSES and self.is_complete(result.html)
+            ):
+                return result
+            timings = result.timings
+            logger.info(f"HTTP fetch of {url} incomplete ({result.status}), rendering")
+        except httpx.HTTPError as e:
+            logger.info(f"HTTP fetch of {url} failed ({e}), rendering")
+
+        async with self.fallback() as engine:
+            result = await engine.fetch(url)
+        # The time lost on the HTTP attempt counts too
+        for stage, seconds in timings.items():
+            result.timings[stage] = result.timings.get(stage, 0.0) + seconds
+        return result
+
+    @classmethod
+    async def shutdown(cls):
+        await cls.primary.shutdown()
+        await cls.fallback.shutdown()
@@ -0,0 +1,90 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from hashlib import sha256
+from typing import Any
+import asyncio
+import logging
+import multiprocessing
+import os
+
+logger = logging.getLogger(__name__)
+
+# process: CPU bound parsers, thread: parsers releasing the GIL, inline: no pool
+PARSE_EXECUTOR = os.getenv("PARSE_EXECUTOR", "process")
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(os.cpu_count() or 1)))
+
+
+def _parse_compact(parser, html: str) -> tuple[tuple[str, ...], list[tuple]]:
+    """Parse in a worker and return the items as field names + value tuples.
+
+    Tuples pickle much smaller and faster than a dict per item.
+    """
+    items = parser.parse(html)
+    if not items:
+        return (), []
+    fields = tuple(items[0])
+    return fields, [tuple(item[field] for field in fields) for item in items]
+
+
+def _fingerprint(parser, html: str) -> str:
+    """Hash of the page's listing section, see ChangeDetector."""
+    return sha256(parser.listing_section(html)).hexdigest()
+
+
+class ParseExecutor:
+    """Runs parsers off the event loop, so crawls and DB writes keep going."""
+
+    def __init__(self, kind: str = PARSE_EXECUTOR, workers: int = PARSE_WORKERS):
+        if kind not in ("process", "thread", "inline"):
+            raise ValueError(f"Unknown parse executor: {kind}")
+
+        self.kind = kind
+        self.workers = workers
+        self._pool: Executor | None = None
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                # Spawned workers do not inherit the browser and event loop state
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="parser"
+                )
+            logger.info(f"Started {self.kind} parse pool with {self.workers} workers")
+        return self._pool
+
+    async def parse(self, parser, html: str) -> list[dict[str, Any]]:
+        if self.kind == "inline":
+            return parser.parse(html)
+
+        loop = asyncio.get_running_loop()
+        fields, rows = await loop.run_in_executor(
+            self._get_pool(), _parse_compact, parser, html
+        )
+        return [dict(zip(fields, row)) for row in rows]
+
+    async def fingerprint(self, parser, html: str) -> str:
+        if self.kind == "inline":
+            return _fingerprint(parser, html)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_pool(), _fingerprint, parser, html)
+
+    async def shutdown(self):
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await asyncio.to_thread(pool.shutdown, cancel_futures=True)
+
+
+_parse_executor: ParseExecutor | None = None
+
+
+def get_parse_executor() -> ParseExecutor:
+    """Returns the process-wide parse executor shared by all crawls."""
+    global _parse_executor
+    if _parse_executor is None:
+        _parse_executor = ParseExecutor()
+    return _parse_executor
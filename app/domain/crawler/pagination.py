@@ -0,0 +1,30 @@
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+import re
+
+
+class PageParamPagination:
+    """Pagination driven by a `page=` like query parameter.
+
+    The number of pages is read from the pagination links of the first page,
+    so all remaining pages can be fetched concurrently.
+    """
+
+    def __init__(self, param: str = "page", max_pages: int = 50):
+        self.param = param
+        self.max_pages = max_pages
+        self._page_re = re.compile(rf"(?:[?&;]|&amp;){re.escape(param)}=(\d+)")
+
+    def page_url(self, url: str, number: int) -> str:
+        parsed = urlparse(url)
+        query = [(k, v) for k, v in parse_qsl(parsed.query) if k != self.param]
+        if number > 1:
+            query.append((self.param, str(number)))
+        return urlunparse(parsed._replace(query=urlencode(query)))
+
+    def last_page(self, html: str) -> int:
+        numbers = [int(n) for n in self._page_re.findall(html)]
+        return min(max(numbers, default=1), self.max_pages)
+
+    def page_urls(self, url: str, html: str) -> list[str]:
+        """URLs of all pages following the first one."""
+        return [self.page_url(url, n) for n in range(2, self.last_page(html) + 1)]
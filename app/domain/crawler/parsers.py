@@ -1,55 +1,238 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List
 from bs4 import BeautifulSoup
+import json
+import os
 import re
 
+try:
+    from lxml import html as lxml_html
+    from lxml.cssselect import CSSSelector
+    from lxml.etree import ParserError
+except ImportError:  # lxml is optional, BeautifulSoup is used as a fallback
+    lxml_html = None
+
+try:
+    from orjson import loads as json_loads
+except ImportError:  # orjson is optional, the stdlib decoder is just slower
+    from json import loads as json_loads
+
+CARD_CLASS = "PropertyCard_propertyCardContent__osPAM"
+TITLE_CLASS = "PropertyCard_propertyCardAddress__hNqyR"
+PRICE_CLASS = "PropertyPrice_propertyPriceAmount__WdEE1"
+PPM_CLASS = "PropertyPrice_propertyPricePerMeter__IfhGa"
+
+OFFER_ID_RE = re.compile(r"/(\d+)-")
+NON_DIGIT_RE = re.compile(r"[^\d]")
+NEXT_DATA_RE = re.compile(
+    r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.DOTALL
+)
+ADVERT_TYPENAME = "Advert"
+# Scripts carry nonces and tracking state which change on every request
+SCRIPT_RE = re.compile(r"<script[^>]*>.*?</script>", re.DOTALL | re.IGNORECASE)
+
+
+def _to_int(text: str | None) -> int | None:
+    if text is None:
+        return None
+    try:
+        return int(NON_DIGIT_RE.sub("", text))
+    except ValueError:
+        return None
+
+
+def build_item(
+    title: str | None, price: str | None, ppm: str | None, href: str | None
+) -> Dict[str, Any]:
+    """Build a record item from the raw texts extracted from a property card."""
+    item = {
+        "title": title,
+        "price": _to_int(price),
+        "currency": "CZK",
+        "flooring_m_squared": None,
+        "description": None,
+        "location": None,
+    }
+
+    if href and (match := OFFER_ID_RE.search(href)):  # ID from offering URL
+        item["description"] = match.group(1)
+    if (ppm_value := _to_int(ppm)) is not None and item["price"] is not None:
+        try:
+            item["flooring_m_squared"] = item["price"] / ppm_value
+        except ZeroDivisionError:
+            pass
+
+    return item
+
+
+class Bs4Backend:
+    """Pure Python backend, slow but always available."""
+
+    name = "bs4"
 
-class BezRealitkyParser:
     @staticmethod
-    def parse_one(card) -> Dict[str, Any]:
-        item = {
-            "title": None,
-            "price": None,
-            "currency": "CZK",
-            "flooring_m_squared": None,
-            "description": None,
-        }
-
-        # Extract from html
-        title_elem = card.find(class_="PropertyCard_propertyCardAddress__hNqyR")
-        price_elem = card.find(class_="PropertyPrice_propertyPriceAmount__WdEE1")
-        ppm_elem = card.find(class_="PropertyPrice_propertyPricePerMeter__IfhGa")
-        if h2_elem := card.find("h2"):  # Extract the ID from offering URL
+    def cards(html: str) -> list:
+        soup = BeautifulSoup(html, "html.parser")
+        return soup.find_all(class_=CARD_CLASS)
+
+    @staticmethod
+    def parse_card(card) -> Dict[str, Any]:
+        def text(class_name):
+            if elem := card.find(class_=class_name):
+                return elem.get_text(strip=True)
+            return None
+
+        href = None
+        if h2_elem := card.find("h2"):
             if (a_elem := h2_elem.find("a")) and a_elem.has_attr("href"):
-                match = re.search(r"/(\d+)-", a_elem["href"])
-                if match:
-                    item["description"] = match.group(1)
-
-        # Save extracted data to item
-        if title_elem:
-            item["title"] = title_elem.get_text(strip=True)
-        if price_elem:
-            price_text = price_elem.get_text(strip=True)
-            price_text = re.sub(r"[^\d]", "", price_text)
+                href = a_elem["href"]
+
+        return build_item(text(TITLE_CLASS), text(PRICE_CLASS), text(PPM_CLASS), href)
+
+
+class LxmlBackend:
+    """libxml2 based backend with selectors compiled once at import time."""
+
+    name = "lxml"
+
+    if lxml_html is not None:
+        _cards = CSSSelector(f".{CARD_CLASS}")
+        _title = CSSSelector(f".{TITLE_CLASS}")
+        _price = CSSSelector(f".{PRICE_CLASS}")
+        _ppm = CSSSelector(f".{PPM_CLASS}")
+
+    @classmethod
+    def cards(cls, html: str) -> list:
+        try:
+            document = lxml_html.fromstring(html)
+        except ParserError:  # Empty body, BeautifulSoup finds no cards either
+            return []
+        return cls._cards(document)
+
+    @classmethod
+    def parse_card(cls, card) -> Dict[str, Any]:
+        def text(selector):
+            if elems := selector(card):
+                return "".join(t.strip() for t in elems[0].itertext())
+            return None
+
+        href = None
+        if (h2_elem := card.find(".//h2")) is not None:
+            if (a_elem := h2_elem.find(".//a")) is not None:
+                href = a_elem.get("href")
+
+        return build_item(text(cls._title), text(cls._price), text(cls._ppm), href)
+
+
+def _field(advert: dict, name: str) -> Any:
+    """Apollo cache keys fields queried with arguments as `name({...})`."""
+    if name in advert:
+        return advert[name]
+    prefix = f"{name}("
+    for key, value in advert.items():
+        if key.startswith(prefix):
+            return value
+    return None
+
+
+def _adverts(node: Any) -> Iterator[dict]:
+    if isinstance(node, dict):
+        if node.get("__typename") == ADVERT_TYPENAME:
+            yield node
+        for value in node.values():
+            yield from _adverts(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _adverts(value)
+
+
+def parse_next_data(html: str) -> List[Dict[str, Any]] | None:
+    """Read listings from the embedded Next.js state, without building a DOM.
+
+    Returns None when the page carries no such state, so the caller can fall
+    back to scraping the rendered cards.
+    """
+    if not (match := NEXT_DATA_RE.search(html)):
+        return None
+    try:
+        data = json_loads(match.group(1))
+    except ValueError:
+        return None
+
+    items, seen = [], set()
+    for advert in _adverts(data):
+        advert_id = advert.get("id")
+        if advert_id is None or advert_id in seen:
+            continue
+        seen.add(advert_id)
+
+        address = _field(advert, "address")
+        price = advert.get("price")
+        surface = advert.get("surface")
+        district = _field(advert, "cityDistrict") or _field(advert, "city")
+        items.append(
+            {
+                "title": address,
+                "price": int(price) if price is not None else None,
+                "currency": advert.get("currency") or "CZK",
+                "flooring_m_squared": float(surface) if surface else None,
+                "description": str(advert_id),
+                "location": district,
+            }
+        )
+    return items or None
+
+
+BACKENDS = {backend.name: backend for backend in (Bs4Backend, LxmlBackend)}
+PARSER_BACKEND = os.getenv(
+    "PARSER_BACKEND", "bs4" if lxml_html is None else LxmlBackend.name
+)
+if PARSER_BACKEND not in BACKENDS:
+    raise ValueError(f"Unknown parser backend: {PARSER_BACKEND}")
+if PARSER_BACKEND == LxmlBackend.name and lxml_html is None:
+    raise ImportError(
+        "PARSER_BACKEND=lxml but lxml is not installed, install lxml and "
+        "cssselect or set PARSER_BACKEND=bs4"
+    )
+
+
+class BezRealitkyParser:
+    backend = BACKENDS[PARSER_BACKEND]
+    # Embedded JSON is exact (area, location) and faster than the DOM
+    use_next_data = os.getenv("PARSER_USE_NEXT_DATA", "true").lower() == "true"
+
+    @staticmethod
+    def is_complete(html: str) -> bool:
+        """Check that the page carries listings, not a captcha or a shell."""
+        if CARD_CLASS in html:
+            return True
+        if not (match := NEXT_DATA_RE.search(html)):
+            return False
+        try:
+            return next(_adverts(json_loads(match.group(1))), None) is not None
+        except ValueError:
+            return False
+
+    @staticmethod
+    def listing_section(html: str) -> bytes:
+        """The part of the page listings are parsed from, in a stable form.
+
+        Equal sections mean equal listings, so the page needs no parsing.
+        """
+        if match := NEXT_DATA_RE.search(html):
             try:
-                item["price"] = int(price_text)
+                adverts = list(_adverts(json_loads(match.group(1))))
             except ValueError:
                 pass
-        if ppm_elem:
-            ppm_text = ppm_elem.get_text(strip=True)
-            ppm_text = re.sub(r"[^\d]", "", ppm_text)
-            try:
-                ppm = int(ppm_text)
-                item["flooring_m_squared"] = item["price"] / ppm
-            except (ValueError, ZeroDivisionError):
-                pass
+            else:
+                return json.dumps(adverts, sort_keys=True, default=str).encode()
+        return SCRIPT_RE.sub("", html).encode()
 
-        return item
+    @classmethod
+    def parse_one(cls, card) -> Dict[str, Any]:
+        return cls.backend.parse_card(card)
 
     @classmethod
     def parse(cls, html: str) -> List[Dict[str, Any]]:
-        soup = BeautifulSoup(html, "html.parser")
-
-        return [
-            cls.parse_one(card)
-            for card in soup.find_all(class_="PropertyCard_propertyCardContent__osPAM")
-        ]
+        if cls.use_next_data and (items := parse_next_data(html)) is not None:
+            return items
+        return [cls.parse_one(card) for card in cls.backend.cards(html)]
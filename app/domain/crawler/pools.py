@@ -0,0 +1,156 @@
+from contextlib import asynccontextmanager
+from typing import Any
+import asyncio
+import logging
+import os
+
+from playwright.async_api import async_playwright, Browser
+from playwright_stealth import Stealth
+
+logger = logging.getLogger(__name__)
+
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+BROWSER_POOL_CONTEXTS = int(os.getenv("BROWSER_POOL_CONTEXTS", "4"))
+BROWSER_POOL_MAX_PAGES = int(os.getenv("BROWSER_POOL_MAX_PAGES", "100"))
+
+
+class _PooledBrowser:
+    """A browser owned by the pool together with its usage counters."""
+
+    def __init__(self, browser: Browser):
+        self.browser = browser
+        self.active = 0
+        self.served = 0
+        self.retiring = False
+
+    @property
+    def is_healthy(self) -> bool:
+        return self.browser.is_connected()
+
+
+class BrowserPool:
+    """Long-lived pool of Chromium browsers that hands out fresh pages.
+
+    Up to `size` browsers are kept running, each serving at most `contexts`
+    concurrent pages. A browser is recycled after it served `max_pages` pages,
+    or replaced as soon as it is found disconnected.
+    """
+
+    def __init__(
+        self,
+        size: int = BROWSER_POOL_SIZE,
+        contexts: int = BROWSER_POOL_CONTEXTS,
+        max_pages: int = BROWSER_POOL_MAX_PAGES,
+        launch_kwargs: dict[str, Any] | None = None,
+    ):
+        if size < 1 or contexts < 1 or max_pages < 1:
+            raise ValueError("Pool size, contexts and max pages must be positive")
+
+        self.size = size
+        self.contexts = contexts
+        self.max_pages = max_pages
+        self.launch_kwargs = launch_kwargs or {}
+        self._stealth = None
+        self._playwright = None
+        self._browsers: list[_PooledBrowser] = []
+        self._retired: list[_PooledBrowser] = []
+        self._slots = asyncio.Semaphore(size * contexts)
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_started(self) -> bool:
+        return self._playwright is not None
+
+    async def start(self):
+        async with self._lock:
+            if self.is_started:
+                return
+            self._stealth = Stealth().use_async(async_playwright())
+            self._playwright = await self._stealth.__aenter__()
+            logger.info(
+                f"Browser pool started ({self.size} browsers x {self.contexts} contexts)"
+            )
+
+    async def close(self):
+        async with self._lock:
+            if not self.is_started:
+                return
+            for pooled in self._browsers + self._retired:
+                await self._close_browser(pooled)
+            self._browsers.clear()
+            self._retired.clear()
+            await self._stealth.__aexit__(None, None, None)
+            self._stealth = None
+            self._playwright = None
+            logger.info("Browser pool closed")
+
+    async def _launch(self) -> _PooledBrowser:
+        browser = await self._playwright.chromium.launch(**self.launch_kwargs)
+        return _PooledBrowser(browser)
+
+    async def _close_browser(self, pooled: _PooledBrowser):
+        try:
+            await pooled.browser.close()
+        except Exception as e:
+            logger.warning(f"Failed to close pooled browser: {e}")
+
+    async def _acquire(self) -> _PooledBrowser:
+        async with self._lock:
+            if not self.is_started:
+                raise RuntimeError("Browser pool is not started")
+
+            # Health check: drop browsers which crashed or were disconnected
+            for pooled in [b for b in self._browsers if not b.is_healthy]:
+                logger.warning("Replacing disconnected browser in pool")
+                self._browsers.remove(pooled)
+                await self._close_browser(pooled)
+
+            candidates = [b for b in self._browsers if b.active < self.contexts]
+            if len(self._browsers) < self.size:
+                pooled = await self._launch()
+                self._browsers.append(pooled)
+            else:
+                pooled = min(candidates, key=lambda b: b.active)
+            pooled.active += 1
+            return pooled
+
+    async def _release(self, pooled: _PooledBrowser):
+        async with self._lock:
+            pooled.active -= 1
+            pooled.served += 1
+            if not pooled.retiring and pooled.served >= self.max_pages:
+                # Retire the browser; a fresh one is launched on the next lease
+                pooled.retiring = True
+                if pooled in self._browsers:
+                    self._browsers.remove(pooled)
+                self._retired.append(pooled)
+            if pooled.retiring and pooled.active == 0:
+                self._retired.remove(pooled)
+                logger.info(f"Recycling browser after {pooled.served} pages")
+                await self._close_browser(pooled)
+
+    @asynccontextmanager
+    async def lease(self):
+        """Lease a page in a fresh browser context from the pool."""
+        async with self._slots:
+            pooled = await self._acquire()
+            try:
+                context = await pooled.browser.new_context()
+                try:
+                    page = await context.new_page()
+                    yield page
+                finally:
+                    await context.close()
+            finally:
+                await self._release(pooled)
+
+
+_browser_pool: BrowserPool | None = None
+
+
+def get_browser_pool(**kwargs) -> BrowserPool:
+    """Returns the process-wide browser pool, creating it on first use."""
+    global _browser_pool
+    if _browser_pool is None:
+        _browser_pool = BrowserPool(**kwargs)
+    return _browser_pool
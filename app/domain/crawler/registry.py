@@ -0,0 +1,119 @@
+from dataclasses import dataclass
+from functools import cached_property, partial
+from importlib import import_module
+from typing import Any, Callable
+from urllib.parse import urlparse
+import inspect
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def load(reference: str) -> Any:
+    """Object referenced as "package.module:attribute", imported on first use."""
+    module, _, attribute = reference.partition(":")
+    return getattr(import_module(module), attribute)
+
+
+@dataclass(frozen=True)
+class SiteCrawler:
+    """How a portal is crawled: its parser, fetch engine and pagination.
+
+    Given as "module:attribute" references, so a portal's modules (and the
+    HTML libraries behind them) are imported only by the crawler processes,
+    see CrawlerRegistry.check, not by everything importing this one. Parsers
+    return items with the fields app.service.ingest stores, so every portal
+    ends up in the same records.
+    """
+
+    parser: str
+    engine: str = "app.domain.crawler.engines:FallbackEngine"
+    pagination: str = "app.domain.crawler.pagination:PageParamPagination"
+
+    @cached_property
+    def parser_cls(self) -> type:
+        return load(self.parser)
+
+    @cached_property
+    def engine_cls(self) -> type:
+        return load(self.engine)
+
+    def make_engine(self) -> Callable:
+        """Engine factory for Crawler.set_engine."""
+        is_complete = getattr(self.parser_cls, "is_complete", None)
+        if is_complete is not None and (
+            "is_complete" in inspect.signature(self.engine_cls).parameters
+        ):
+            # Lets e.g. FallbackEngine tell a captcha or a shell from a page
+            return partial(self.engine_cls, is_complete=is_complete)
+        return self.engine_cls
+
+    def make_pagination(self):
+        return load(self.pagination)()
+
+
+class CrawlerRegistry:
+    """Maps domains, as stored in Domain and Site rows, to their SiteCrawler."""
+
+    def __init__(self):
+        self._crawlers: dict[str, SiteCrawler] = {}
+
+    def register(self, domain: str, crawler: SiteCrawler):
+        """Register a host, optionally with a port, or a domain and its subdomains.
+
+        Domains are matched by their labels only, there is no public suffix
+        list: register "example.co.uk", never "co.uk", which would match every
+        site under it.
+        """
+        self._crawlers[domain] = crawler
+
+    def check(self):
+        """Import every registered reference, so a wrong one fails at startup.
+
+        Rather than in the middle of a crawl. The crawlers still resolve their
+        references on first use, check leaves them untouched.
+        """
+        for crawler in self._crawlers.values():
+            for reference in (crawler.parser, crawler.engine, crawler.pagination):
+                load(reference)
+
+    def get(self, url: str) -> SiteCrawler:
+        """Crawler of a URL or a bare domain, the most specific match wins.
+
+        That is the host with its port, the host, then its parent domains,
+        e.g. www.example.co.uk, example.co.uk and co.uk.
+        """
+        return self._crawlers[self._match(url)]
+
+    def domain(self, url: str) -> str:
+        """Registered host or domain a URL falls under, without the port.
+
+        E.g. bezrealitky.cz for https://www.bezrealitky.cz/vyhledat.
+        """
+        return urlparse(f"//{self._match(url)}").hostname
+
+    def _match(self, url: str) -> str:
+        parsed = urlparse(url if "//" in url else f"//{url}")
+        labels = (parsed.hostname or "").split(".")
+        parents = (".".join(labels[i:]) for i in range(1, len(labels) - 1))
+        for key in (parsed.netloc, ".".join(labels), *parents):
+            if key in self._crawlers:
+                return key
+        raise LookupError(f"No crawler registered for {parsed.netloc}")
+
+    async def shutdown(self):
+        """Shut down the engines which were used, their pools are shared."""
+        engines = {
+            crawler.engine_cls
+            for crawler in self._crawlers.values()
+            if "engine_cls" in crawler.__dict__
+        }
+        for engine in engines:
+            await engine.shutdown()
+
+
+crawler_registry = CrawlerRegistry()
+crawler_registry.register(
+    "bezrealitky.cz",
+    SiteCrawler(parser="app.domain.crawler.parsers:BezRealitkyParser"),
+)
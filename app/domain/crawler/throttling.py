@@ -0,0 +1,226 @@
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, replace
+from datetime import timedelta
+from typing import Any, Awaitable, Callable
+from urllib.parse import urlparse
+import asyncio
+import logging
+import math
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+CRAWL_DOMAIN_CONCURRENCY = int(os.getenv("CRAWL_DOMAIN_CONCURRENCY", "2"))
+CRAWL_POLITENESS_DELAY = timedelta(
+    seconds=float(os.getenv("CRAWL_POLITENESS_DELAY", "1.0"))
+)
+CRAWL_BACKOFF = timedelta(seconds=float(os.getenv("CRAWL_BACKOFF", "30")))
+CRAWL_MAX_BACKOFF = timedelta(seconds=float(os.getenv("CRAWL_MAX_BACKOFF", "900")))
+# Processes crawling at once, e.g. distributed workers. Limits are enforced by
+# each process on its own, so each gets an equal share of a domain's limits
+CRAWL_WORKERS = int(os.getenv("CRAWL_WORKERS", "1"))
+
+# Adaptive rate: halved on every block, then raised back by a step per success
+RATE_DECREASE = 0.5
+RATE_RECOVERY = 0.05  # Of the policy maximum, or BLOCKED_RATE if unlimited
+MIN_RATE = 0.01  # Requests per second
+BLOCKED_RATE = 1.0  # Where an unlimited domain starts slowing down from
+TOKEN_EPSILON = 1e-9
+
+
+def per_delay(delay: timedelta) -> float:
+    """Requests per second of one request per `delay`."""
+    return 1 / delay.total_seconds() if delay.total_seconds() else math.inf
+
+
+@dataclass(frozen=True)
+class RatePolicy:
+    """Limits of the requests sent to one domain."""
+
+    max_rps: float = per_delay(CRAWL_POLITENESS_DELAY)
+    max_concurrency: int = CRAWL_DOMAIN_CONCURRENCY
+    burst: int = 1  # Requests which may start at once after an idle period
+    backoff: timedelta = CRAWL_BACKOFF  # Pause after a block, doubles on repeats
+    max_backoff: timedelta = CRAWL_MAX_BACKOFF
+
+    def share(self, processes: int) -> "RatePolicy":
+        """Limits of one of `processes` crawling the domain at once.
+
+        Concurrency is never below one request, so with more processes than
+        the policy allows concurrent requests, the domain gets more of them.
+        """
+        return replace(
+            self,
+            max_rps=self.max_rps / processes,
+            max_concurrency=max(self.max_concurrency // processes, 1),
+        )
+
+
+class _DomainLimiter:
+    """Token bucket of one domain, refilled at a rate adapted to blocks."""
+
+    def __init__(
+        self,
+        domain: str,
+        policy: RatePolicy,
+        clock: Callable[[], float],
+        sleep: Callable[[float], Awaitable[Any]],
+    ):
+        self.domain = domain
+        self.policy = policy
+        self.clock = clock
+        self.sleep = sleep
+        self.rate = policy.max_rps
+        self.tokens = float(policy.burst)
+        self.updated = 0.0
+        self.paused_until = 0.0
+        self.blocks = 0  # In a row
+        self.semaphore = asyncio.Semaphore(policy.max_concurrency)
+        self._lock = asyncio.Lock()
+
+    def set_policy(self, policy: RatePolicy):
+        if policy.max_concurrency != self.policy.max_concurrency:
+            # Requests holding the old semaphore release it, nothing is lost
+            self.semaphore = asyncio.Semaphore(policy.max_concurrency)
+        # Keep a slow-down in effect, but never exceed the new maximum
+        slowed_down = self.rate < self.policy.max_rps
+        self.rate = min(self.rate, policy.max_rps) if slowed_down else policy.max_rps
+        self.policy = policy
+
+    def _refill(self, now: float):
+        if math.isinf(self.rate):
+            self.tokens = float(self.policy.burst)
+        else:
+            self.tokens = min(
+                self.policy.burst, self.tokens + (now - self.updated) * self.rate
+            )
+        self.updated = now
+
+    async def acquire(self):
+        """Wait for a token; callers queue up in FIFO order."""
+        async with self._lock:
+            while True:
+                now = self.clock()
+                if self.paused_until > now:
+                    await self.sleep(self.paused_until - now)
+                    continue
+                self._refill(now)
+                # Refills may fall short of a token by a rounding error, which
+                # the clock cannot wait out once it is too large to resolve it
+                if self.tokens >= 1 - TOKEN_EPSILON:
+                    self.tokens = max(self.tokens - 1, 0.0)
+                    return
+                await self.sleep((1 - self.tokens) / self.rate)
+
+    def blocked(self):
+        self.blocks += 1
+        base = self.rate if math.isfinite(self.rate) else BLOCKED_RATE
+        self.rate = max(base * RATE_DECREASE, MIN_RATE)
+        backoff = min(
+            self.policy.backoff.total_seconds() * 2 ** (self.blocks - 1),
+            self.policy.max_backoff.total_seconds(),
+        )
+        self.paused_until = max(self.paused_until, self.clock() + backoff)
+        self.tokens = 0.0
+        logger.warning(
+            f"Blocked by {self.domain} ({self.blocks} in a row), pausing for "
+            f"{backoff:.0f}s and slowing down to {self.rate:.2f} requests/s"
+        )
+
+    def succeeded(self):
+        self.blocks = 0
+        if self.rate < self.policy.max_rps:
+            # An unlimited domain ramps up to where it started slowing down
+            # from, then is unlimited again
+            ceiling = self.policy.max_rps
+            if math.isinf(ceiling):
+                ceiling = BLOCKED_RATE
+            self.rate += ceiling * RATE_RECOVERY
+            if self.rate >= ceiling:
+                self.rate = self.policy.max_rps
+                logger.info(f"Recovered full request rate for {self.domain}")
+
+
+class DomainThrottle:
+    """Limits concurrent requests per domain and their rate with a token bucket.
+
+    The rate adapts to the domain: every blocked response (see `record`)
+    pauses the domain with an exponential backoff and halves its rate, every
+    successful one raises it back by a step, up to the policy maximum.
+
+    The state is kept in this process only. When `workers` processes crawl at
+    once, each enforces its share of the policies, so together they keep to
+    them; a block seen by one of them slows down only that one.
+
+    `clock` and `sleep` measure and wait out the delays, e.g. a fake clock in
+    tests.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = CRAWL_DOMAIN_CONCURRENCY,
+        delay: timedelta = CRAWL_POLITENESS_DELAY,
+        workers: int = CRAWL_WORKERS,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+    ):
+        if concurrency < 1:
+            raise ValueError("Concurrency must be positive")
+        if workers < 1:
+            raise ValueError("Number of workers must be positive")
+
+        # Limits of the domain as a whole, see set_policy
+        self.default_policy = RatePolicy(
+            max_rps=per_delay(delay), max_concurrency=concurrency
+        )
+        self.workers = workers
+        self.clock = clock
+        self.sleep = sleep
+        self._limiters: dict[str, _DomainLimiter] = {}
+
+    def _limiter(self, domain: str) -> _DomainLimiter:
+        if (limiter := self._limiters.get(domain)) is None:
+            limiter = _DomainLimiter(
+                domain, self.default_policy.share(self.workers), self.clock, self.sleep
+            )
+            self._limiters[domain] = limiter
+        return limiter
+
+    def set_policy(self, domain: str, policy: RatePolicy):
+        """Limit the domain as a whole, this process takes its share."""
+        if policy.max_concurrency < 1:
+            raise ValueError("Concurrency must be positive")
+        if policy.max_rps <= 0:
+            raise ValueError("Request rate must be positive")
+        self._limiter(domain).set_policy(policy.share(self.workers))
+
+    def rate(self, domain: str) -> float:
+        """Current requests per second allowed for the domain in this process."""
+        return self._limiter(domain).rate
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        limiter = self._limiter(urlparse(url).netloc)
+        async with limiter.semaphore:
+            await limiter.acquire()
+            yield
+
+    def record(self, url: str, blocked: bool):
+        """Feed back how the domain answered a request made in a slot."""
+        limiter = self._limiter(urlparse(url).netloc)
+        if blocked:
+            limiter.blocked()
+        else:
+            limiter.succeeded()
+
+
+_domain_throttle: DomainThrottle | None = None
+
+
+def get_domain_throttle() -> DomainThrottle:
+    """Returns the process-wide throttle shared by all crawls."""
+    global _domain_throttle
+    if _domain_throttle is None:
+        _domain_throttle = DomainThrottle()
+    return _domain_throttle
@@ -1,62 +1,207 @@
 import asyncio
-from typing import Callable, Any
+import heapq
+import itertools
+import random
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Any
 from datetime import timedelta
 import logging
+import signal
 
 logger = logging.getLogger(__name__)
 
 
-class Scheduler:
+@dataclass(eq=False)
+class Job:
+    """A callback invocation repeated every `interval`.
+
+    Each run is delayed by a random `jitter` to spread load, jobs due at the
+    same time start in `priority` order (lower first) and jobs sharing a
+    `domain` count against the same per-domain concurrency cap.
+    """
+
+    kwargs: dict[str, Any]
+    interval: timedelta
+    jitter: timedelta = timedelta(0)
+    priority: int = 0
+    domain: str | None = None
+
+    next_run: float = field(default=0.0, init=False)
+    task: asyncio.Task | None = field(default=None, init=False, repr=False)
+
+    @property
+    def is_running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def jittered(self, at: float) -> float:
+        return at + random.uniform(0, self.jitter.total_seconds())
+
+
+class StoppableLoop:
+    """Base of the long running loops: the Scheduler and the crawl workers.
+
+    Subclasses implement _loop, which returns once stopped, and may let their
+    running work finish in _drain and cancel what is left in _cancel.
+    """
+
     def __init__(
         self,
-        callback: Callable,
-        callback_kwargs: list[dict[str, Any]],
-        frequency: timedelta,
+        on_start: list[Callable[[], Awaitable[Any]]] | None = None,
+        on_stop: list[Callable[[], Awaitable[Any]]] | None = None,
     ):
-        if not asyncio.iscoroutinefunction(callback):
-            raise ValueError("Callback must be an asynchronous function")
-
-        self.callback = callback
-        self.callback_kwargs = callback_kwargs
-        self.frequency = frequency
-        self.is_stopped = False
+        self.on_start = on_start or []
+        self.on_stop = on_stop or []
         self._task = None
+        self._stopped = asyncio.Event()
+
+    @property
+    def is_stopped(self) -> bool:
+        return self._stopped.is_set()
 
     async def sleep(self, duration: timedelta):
-        time_target = asyncio.get_event_loop().time() + duration.total_seconds()
-        logger.info(
-            f"Scheduler sleeping for {duration.total_seconds()} seconds, until {time_target}"
-        )
-        while asyncio.get_event_loop().time() < time_target:
-            if self.is_stopped:
-                break
-            await asyncio.sleep(1)
+        """Sleep for `duration`, waking up immediately when stopped."""
+        try:
+            await asyncio.wait_for(self._stopped.wait(), duration.total_seconds())
+        except asyncio.TimeoutError:
+            pass
+
+    async def _loop(self):
+        raise NotImplementedError
+
+    async def _drain(self):
+        """Wait for the running work, after a graceful stop."""
+
+    async def _cancel(self):
+        """Cancel the work still running, when stopping."""
+
+    async def _shutdown(self):
+        """Run the registered on_stop hooks, e.g. to release shared browsers."""
+        for hook in self.on_stop:
+            try:
+                await hook()
+            except Exception as e:
+                logger.error(f"{type(self).__name__} shutdown hook failed: {e}")
 
     async def _run_loop(self):
-        while not self.is_stopped:
-            start = asyncio.get_event_loop().time()
-            tasks = []
-            for callback_kwarg in self.callback_kwargs:
-                tasks.append(asyncio.create_task(self.callback(**callback_kwarg)))
-
-            if tasks:
-                await asyncio.gather(*tasks)
-            elapsed = asyncio.get_event_loop().time() - start
-            sleep_time = self.frequency.total_seconds() - elapsed
-            if sleep_time > 0:
-                await self.sleep(timedelta(seconds=sleep_time))
+        # e.g. docker stop, finishing the running work like a graceful stop
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, self.stop)
+        try:
+            # e.g. loading caches, a failing hook stops before any work
+            for hook in self.on_start:
+                await hook()
+            await self._loop()
+            await self._drain()
+        finally:
+            await self._cancel()
+            await self._shutdown()
 
     async def start(self):
         self._task = asyncio.create_task(self._run_loop())
 
     def stop(self, force: bool = False):
-        self.is_stopped = True
+        self._stopped.set()
         if force and self._task:
             self._task.cancel()
 
     def run_forever(self):
-        """Run the scheduler in a blocking manner."""
+        """Run in a blocking manner."""
         try:
             asyncio.run(self._run_loop())
         except KeyboardInterrupt:
             self.stop(force=True)
+
+
+class Scheduler(StoppableLoop):
+    def __init__(
+        self,
+        callback: Callable,
+        callback_kwargs: list[dict[str, Any]] | None = None,
+        frequency: timedelta | None = None,
+        on_stop: list[Callable[[], Awaitable[Any]]] | None = None,
+        jobs: list[Job] | None = None,
+        on_start: list[Callable[[], Awaitable[Any]]] | None = None,
+        max_concurrency: int = 8,
+        domain_concurrency: int = 2,
+    ):
+        if not asyncio.iscoroutinefunction(callback):
+            raise ValueError("Callback must be an asynchronous function")
+        if callback_kwargs and frequency is None:
+            raise ValueError("Frequency is required together with callback_kwargs")
+
+        super().__init__(on_start, on_stop)
+        self.callback = callback
+        self.jobs = list(jobs or []) + [
+            Job(kwargs=kwargs, interval=frequency) for kwargs in callback_kwargs or []
+        ]
+        self._queue: list[tuple[float, int, int, Job]] = []
+        self._sequence = itertools.count()
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._domain_slots = defaultdict(lambda: asyncio.Semaphore(domain_concurrency))
+
+    def _push(self, job: Job, at: float):
+        heapq.heappush(
+            self._queue,
+            (job.jittered(at), job.priority, next(self._sequence), job),
+        )
+        job.next_run = at
+
+    async def _run_job(self, job: Job):
+        async with self._slots:
+            if job.domain is None:
+                await self.callback(**job.kwargs)
+                return
+            async with self._domain_slots[job.domain]:
+                await self.callback(**job.kwargs)
+
+    def _start(self, job: Job, now: float):
+        if job.is_running:
+            logger.warning(f"Skipping run of {job.kwargs}, previous run still going")
+        else:
+            job.task = asyncio.create_task(self._run_job(job))
+            job.task.add_done_callback(self._log_failure)
+
+        # Runs missed while the loop was busy are coalesced into this one
+        next_run = job.next_run + job.interval.total_seconds()
+        if next_run <= now:
+            missed = int((now - next_run) // job.interval.total_seconds()) + 1
+            logger.warning(f"Job {job.kwargs} missed {missed} runs")
+            next_run += missed * job.interval.total_seconds()
+        self._push(job, next_run)
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task):
+        if not task.cancelled() and (e := task.exception()) is not None:
+            logger.error(f"Scheduled job failed: {e}")
+
+    async def _drain(self):
+        # Graceful stop lets the running jobs finish
+        running = [job.task for job in self.jobs if job.is_running]
+        await asyncio.gather(*running, return_exceptions=True)
+
+    async def _cancel(self):
+        for job in self.jobs:
+            if job.is_running:
+                job.task.cancel()
+
+    async def _loop(self):
+        loop = asyncio.get_running_loop()
+        self._queue.clear()
+        for job in self.jobs:
+            self._push(job, loop.time())
+
+        while not self.is_stopped and self._queue:
+            due_at = self._queue[0][0]
+            delay = due_at - loop.time()
+            if delay > 0:
+                logger.info(f"Scheduler sleeping for {delay:.1f} seconds")
+                await self.sleep(timedelta(seconds=delay))
+                continue
+
+            now = loop.time()
+            due = []
+            while self._queue and self._queue[0][0] <= now:
+                due.append(heapq.heappop(self._queue))
+            # Semaphores are FIFO, so starting in priority order runs them first
+            for _, _, _, job in sorted(due, key=lambda entry: entry[1:3]):
+                self._start(job, now)
@@ -1,14 +1,21 @@
 from datetime import timedelta
+from functools import partial
 from urllib.parse import urlparse
+import os
 
-from sqlalchemy import select
-
-from app.domain.scheduler.schedulers import Scheduler
+from app.domain.scheduler.schedulers import Job, Scheduler
 from app.domain.crawler.crawlers import build_crawler
-from app.domain.crawler.parsers import BezRealitkyParser
-from app.model.models.models import RealEstateRecord, Description, Domain, Site, Crawl
+from app.domain.crawler.executors import get_parse_executor
+from app.domain.crawler.throttling import get_domain_throttle
+from app.domain.crawler.registry import crawler_registry
+from app.model.models.models import Crawl
 from app.model.session import aget_session
-from app.domain.utils.time import now
+from app.service.crawls import run_pipeline
+from app.service.fingerprints import ChangeDetector, load_fingerprints
+from app.service.jobs import CrawlWorker, enqueue_job
+from app.service.metrics import start_metrics_server
+from app.service.sites import load_rate_policy, site_registry
+from app.service.stats import stats_refresher
 
 
 import logging
@@ -21,73 +28,104 @@ URLS = [
     "https://www.bezrealitky.cz/vyhledat?estateType=BYT&location=exact&offerType=PRODEJ&osm_value=Hlavn%C3%AD+m%C4%9Bsto+Praha%2C+Praha%2C+%C4%8Cesko&regionOsmIds=R435514&currency=CZK&locale=CS"
 ]
 FREQUENCY = timedelta(hours=24)
+FREQUENCY_JITTER = timedelta(minutes=10)  # Spread crawls, no thundering herd
+CRAWL_TIME_BUDGET = timedelta(hours=1)
+# Keep the fetched HTML, so it can be re-parsed later with `python -m app.replay`
+CRAWL_SNAPSHOTS = os.getenv("CRAWL_SNAPSHOTS", "true").lower() == "true"
+# Skip parsing and storing results pages which did not change since the last crawl
+CRAWL_SKIP_UNCHANGED = os.getenv("CRAWL_SKIP_UNCHANGED", "true").lower() == "true"
+# standalone: schedule and run crawls in this process; scheduler: only queue
+# them; worker: run the queued ones, any number of workers can share the queue
+CRAWLER_MODE = os.getenv("CRAWLER_MODE", "standalone")
 
 
 async def run_crawl(url: str):
     print(f"Starting crawl for {url}")
 
-    parsed_url = urlparse(url)
-    domain_name = parsed_url.netloc
-    site_url = f"{parsed_url.scheme}://{domain_name}"
+    site = crawler_registry.get(url)
+    site_id = await site_registry.get_site_id(url)
+    # Regulations may change between crawls, so they are read every time
+    throttle = get_domain_throttle()
+    if (policy := await load_rate_policy(url, throttle.default_policy)) is None:
+        logger.warning(f"Crawling {url} is not allowed by its domain regulation")
+        return None
+    throttle.set_policy(urlparse(url).netloc, policy)
 
     async with aget_session() as session:
-        # 1. Get or create Domain  # TODO: vibecoded - update this
-        stmt = select(Domain).where(Domain.url == domain_name)
-        domain = (await session.execute(stmt)).scalar_one_or_none()
-        if not domain:
-            domain = Domain(url=domain_name)
-            session.add(domain)
-            await session.flush()
-
-        # 2. Get or create Site  # TODO: vibecoded - udpate this
-        stmt = select(Site).where(Site.url == site_url)
-        site = (await session.execute(stmt)).scalar_one_or_none()
-        if not site:
-            site = Site(url=site_url, domain=domain)
-            session.add(site)
-            await session.flush()
-
-        # 3. Create Crawl
-        crawl = Crawl(site=site)
+        crawl = Crawl(site_id=site_id)
         session.add(crawl)
         await session.commit()
 
-    try:
-        # Setup Crawler
-        crawler = build_crawler(url)
-        async with crawler.get_page() as page:
-            html = await page.content()
-        parser = BezRealitkyParser()
-        results = parser.parse(html)
-        async with aget_session() as session:
-            for item in results:
-                record = RealEstateRecord(
-                    published_at=now(),
-                    title=item["title"],
-                    price=item["price"],
-                    currency=item["currency"],
-                    flooring_m_squared=item["flooring_m_squared"],
-                    crawl=crawl,
-                )
-                description = Description(text=item["description"], record=record)
-                session.add(record)
-                session.add(description)
-            await session.commit()
-    except Exception as e:
-        logger.error(f"Error during crawling: {e}")
-        return
-    logger.info(f"Crawl completed for {url} with {len(results)} records found.")
+        detector = None
+        # Parsers without a listing section are always parsed
+        if CRAWL_SKIP_UNCHANGED and hasattr(site.parser_cls, "listing_section"):
+            previous = await load_fingerprints(session, site_id)
+            fingerprint = partial(get_parse_executor().fingerprint, site.parser_cls)
+            detector = ChangeDetector(previous, fingerprint)
+
+    def open_pages():
+        validators = detector.validators if detector is not None else None
+        crawler = build_crawler(url, validators=validators, site=site)
+        return crawler.iter_pages(time_budget=CRAWL_TIME_BUDGET)
+
+    stats = await run_pipeline(
+        crawl,
+        url,
+        open_pages,
+        site.parser_cls,
+        archive=CRAWL_SNAPSHOTS,
+        detector=detector,
+    )
+    # Statistics are refreshed in the background, debounced across crawls
+    stats_refresher.request()
+    return stats
 
 
-def crawl():
-    scheduler = Scheduler(
-        callback=run_crawl,
-        callback_kwargs=[{"url": url} for url in URLS],
-        frequency=FREQUENCY,
-    )
+async def enqueue_crawl(url: str):
+    async with aget_session() as session:
+        queued = await enqueue_job(session, url)
+        await session.commit()
+    if not queued:
+        logger.warning(f"Crawl of {url} is still queued or running, not queueing")
+
+
+async def warm_up():
+    """Check the crawler references and load the site ids before crawling."""
+    crawler_registry.check()
+    await site_registry.warm()
 
-    logger.info(f"Starting Scheduler with frequency: {FREQUENCY}")
-    scheduler.run_forever()
+
+def crawl():
+    if CRAWLER_MODE not in ("standalone", "scheduler", "worker"):
+        raise ValueError(f"Unknown crawler mode: {CRAWLER_MODE}")
+
+    on_stop = [
+        crawler_registry.shutdown,
+        get_parse_executor().shutdown,
+        stats_refresher.shutdown,
+    ]
+    if CRAWLER_MODE == "worker":
+        runner = CrawlWorker(callback=run_crawl, on_start=[warm_up], on_stop=on_stop)
+        logger.info(f"Starting crawl worker {runner.name}")
+    else:
+        runner = Scheduler(
+            callback=run_crawl if CRAWLER_MODE == "standalone" else enqueue_crawl,
+            jobs=[
+                Job(
+                    kwargs={"url": url},
+                    interval=FREQUENCY,
+                    jitter=FREQUENCY_JITTER,
+                    domain=urlparse(url).netloc,
+                )
+                for url in URLS
+            ],
+            on_start=[warm_up],
+            on_stop=on_stop,
+        )
+        logger.info(f"Starting {CRAWLER_MODE} Scheduler with frequency: {FREQUENCY}")
+
+    start_metrics_server()
+    runner.run_forever()
 
 
 if __name__ == "__main__":
@@ -10,6 +10,7 @@ from alembic import context
 
 # Import base and set it as target_metadata for Alembic's autogenerate support
 from app.model.models import Base
+from app.model.partitions import PARTITION_RE
 
 # Import .env variables
 from dotenv import load_dotenv
@@ -50,6 +51,12 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+
+def include_name(name, type_, parent_names) -> bool:
+    """Partitions are managed by app.model.partitions, not by the models."""
+    return not (type_ == "table" and PARTITION_RE.match(name))
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -74,6 +81,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         compare_type=True,
         compare_server_default=True,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -101,6 +109,7 @@ def run_migrations_online() -> None:
             target_metadata=target_metadata,
             compare_type=True,
             compare_server_default=True,
+            include_name=include_name,
         )
 
         with context.begin_transaction():
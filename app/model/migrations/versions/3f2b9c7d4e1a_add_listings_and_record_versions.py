@@ -0,0 +1,46 @@
+"""Add listings and record versions
+
+Revision ID: 3f2b9c7d4e1a
+Revises: 61906c4153c8
+Create Date: 2026-10-18 10:12:31.418223
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f2b9c7d4e1a'
+down_revision: Union[str, Sequence[str], None] = '61906c4153c8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('listings',
+    sa.Column('site_id', sa.Integer(), nullable=False),
+    sa.Column('external_id', sa.String(length=64), nullable=False),
+    sa.Column('last_seen_at', sa.DateTime(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['site_id'], ['sites.id'], name=op.f('fk_listings_site_id_sites')),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_listings')),
+    sa.UniqueConstraint('site_id', 'external_id', name=op.f('uq_listings_site_id'))
+    )
+    op.add_column('real_estate_records', sa.Column('listing_id', sa.Integer(), nullable=True))
+    op.add_column('real_estate_records', sa.Column('current', sa.Boolean(), server_default=sa.true(), nullable=False))
+    op.create_foreign_key(op.f('fk_real_estate_records_listing_id_listings'), 'real_estate_records', 'listings', ['listing_id'], ['id'])
+    op.create_index(op.f('ix_real_estate_records_listing_id'), 'real_estate_records', ['listing_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_real_estate_records_listing_id'), table_name='real_estate_records')
+    op.drop_constraint(op.f('fk_real_estate_records_listing_id_listings'), 'real_estate_records', type_='foreignkey')
+    op.drop_column('real_estate_records', 'current')
+    op.drop_column('real_estate_records', 'listing_id')
+    op.drop_table('listings')
@@ -0,0 +1,36 @@
+"""Add search indexes for real estate records
+
+Revision ID: a7c41e0b95d2
+Revises: 3f2b9c7d4e1a
+Create Date: 2026-10-18 11:02:47.105342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c41e0b95d2'
+down_revision: Union[str, Sequence[str], None] = '3f2b9c7d4e1a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Trigram index makes title ILIKE '%...%' searchable without a seq scan
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_real_estate_records_title_trgm', 'real_estate_records', ['title'], unique=False, postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}, postgresql_where=sa.text('current'))
+    op.create_index('ix_real_estate_records_published_at', 'real_estate_records', ['published_at'], unique=False, postgresql_where=sa.text('current'))
+    op.create_index('ix_real_estate_records_flooring_m_squared', 'real_estate_records', ['flooring_m_squared'], unique=False, postgresql_where=sa.text('current'))
+    op.create_index('ix_real_estate_records_price_flooring_m_squared', 'real_estate_records', ['price', 'flooring_m_squared'], unique=False, postgresql_where=sa.text('current'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_real_estate_records_price_flooring_m_squared', table_name='real_estate_records', postgresql_where=sa.text('current'))
+    op.drop_index('ix_real_estate_records_flooring_m_squared', table_name='real_estate_records', postgresql_where=sa.text('current'))
+    op.drop_index('ix_real_estate_records_published_at', table_name='real_estate_records', postgresql_where=sa.text('current'))
+    op.drop_index('ix_real_estate_records_title_trgm', table_name='real_estate_records', postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}, postgresql_where=sa.text('current'))
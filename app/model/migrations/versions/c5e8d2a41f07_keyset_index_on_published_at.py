@@ -0,0 +1,30 @@
+"""Keyset pagination index on published_at, id
+
+Revision ID: c5e8d2a41f07
+Revises: a7c41e0b95d2
+Create Date: 2026-10-18 11:48:09.533170
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e8d2a41f07'
+down_revision: Union[str, Sequence[str], None] = 'a7c41e0b95d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_real_estate_records_published_at_id', 'real_estate_records', ['published_at', 'id'], unique=False, postgresql_where=sa.text('current'))
+    op.drop_index('ix_real_estate_records_published_at', table_name='real_estate_records', postgresql_where=sa.text('current'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_real_estate_records_published_at', 'real_estate_records', ['published_at'], unique=False, postgresql_where=sa.text('current'))
+    op.drop_index('ix_real_estate_records_published_at_id', table_name='real_estate_records', postgresql_where=sa.text('current'))
@@ -0,0 +1,36 @@
+"""Add crawl metrics
+
+Revision ID: d81f3a6c20b4
+Revises: c5e8d2a41f07
+Create Date: 2026-10-18 13:02:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81f3a6c20b4'
+down_revision: Union[str, Sequence[str], None] = 'c5e8d2a41f07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('crawls', sa.Column('page_count', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.add_column('crawls', sa.Column('record_count', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.add_column('crawls', sa.Column('error_count', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.add_column('crawls', sa.Column('bytes_fetched', sa.BigInteger(), server_default=sa.text('0'), nullable=False))
+    op.add_column('crawls', sa.Column('timings', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('crawls', 'timings')
+    op.drop_column('crawls', 'bytes_fetched')
+    op.drop_column('crawls', 'error_count')
+    op.drop_column('crawls', 'record_count')
+    op.drop_column('crawls', 'page_count')
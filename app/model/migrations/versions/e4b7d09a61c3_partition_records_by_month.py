@@ -0,0 +1,151 @@
+"""Partition record tables by month
+
+Revision ID: e4b7d09a61c3
+Revises: 83ae63588a3b
+Create Date: 2026-10-18 15:36:12.904417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b7d09a61c3'
+down_revision: Union[str, Sequence[str], None] = '83ae63588a3b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('descriptions', 'real_estate_records', 'records')
+PARTITION_BY = 'RANGE (created_at)'
+
+# Monthly partitions from the oldest row up to three months ahead,
+# named like app.model.partitions does, e.g. records_y2026m10
+CREATE_PARTITIONS = """
+DO $$
+DECLARE
+    month date := date_trunc('month', least(
+        (SELECT min(created_at) FROM records_unpartitioned),
+        (SELECT min(created_at) FROM descriptions_unpartitioned),
+        now() AT TIME ZONE 'UTC'
+    ));
+    last_month date := date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months';
+    parent text;
+BEGIN
+    WHILE month <= last_month LOOP
+        FOREACH parent IN ARRAY ARRAY['records', 'real_estate_records', 'descriptions'] LOOP
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                parent || to_char(month, '"_y"YYYY"m"MM'), parent, month, (month + interval '1 month')::date
+            );
+        END LOOP;
+        month := (month + interval '1 month')::date;
+    END LOOP;
+END $$
+"""
+
+
+def _set_aside(suffix: str) -> None:
+    """Rename the tables, so new ones can be created and filled from them."""
+    op.drop_constraint('fk_descriptions_record_id_records', 'descriptions', type_='foreignkey')
+    op.drop_constraint('fk_real_estate_records_id_records', 'real_estate_records', type_='foreignkey')
+    for table in TABLES:
+        op.rename_table(table, f'{table}_{suffix}')
+        op.execute(f'ALTER TABLE {table}_{suffix} RENAME CONSTRAINT pk_{table} TO pk_{table}_{suffix}')
+    op.execute('ALTER SEQUENCE records_id_seq OWNED BY NONE')
+    op.execute('ALTER SEQUENCE descriptions_id_seq OWNED BY NONE')
+
+
+def _create_tables(partitioned: bool) -> None:
+    kwargs = {'postgresql_partition_by': PARTITION_BY} if partitioned else {}
+    # The partition key must be a part of every primary key
+    key = ['id', 'created_at'] if partitioned else ['id']
+
+    op.create_table('records',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('records_id_seq'::regclass)"), nullable=False),
+    sa.Column('crawl_id', sa.Integer(), nullable=False),
+    sa.Column('record_type', sa.String(length=50), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['crawl_id'], ['crawls.id'], name=op.f('fk_records_crawl_id_crawls')),
+    sa.PrimaryKeyConstraint(*key, name=op.f('pk_records')),
+    **kwargs
+    )
+    op.create_table('real_estate_records',
+    sa.Column('id', sa.Integer(), nullable=False),
+    *([sa.Column('created_at', sa.DateTime(), nullable=False)] if partitioned else []),
+    sa.Column('published_at', sa.DateTime(), nullable=True),
+    sa.Column('title', sa.String(length=2048), nullable=False),
+    sa.Column('price', sa.Numeric(precision=12, scale=2), nullable=True),
+    sa.Column('currency', sa.String(length=3), nullable=True),
+    sa.Column('location', sa.String(length=2048), nullable=True),
+    sa.Column('flooring_m_squared', sa.Float(), nullable=True),
+    sa.Column('listing_id', sa.Integer(), nullable=True),
+    sa.Column('current', sa.Boolean(), server_default=sa.true(), nullable=False),
+    sa.CheckConstraint('(price IS NULL AND currency IS NULL) OR (price IS NOT NULL AND currency IS NOT NULL)', name=op.f('ck_real_estate_records_check_price_currency_together')),
+    sa.CheckConstraint('price >= 0', name=op.f('ck_real_estate_records_check_price_non_negative')),
+    sa.ForeignKeyConstraint(['listing_id'], ['listings.id'], name=op.f('fk_real_estate_records_listing_id_listings')),
+    *([] if partitioned else [sa.ForeignKeyConstraint(['id'], ['records.id'], name=op.f('fk_real_estate_records_id_records'))]),
+    sa.PrimaryKeyConstraint(*key, name=op.f('pk_real_estate_records')),
+    **kwargs
+    )
+    op.create_table('descriptions',
+    sa.Column('record_id', sa.Integer(), nullable=False),
+    sa.Column('current', sa.Boolean(), nullable=False),
+    sa.Column('text', sa.String(length=16384), nullable=False),
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('descriptions_id_seq'::regclass)"), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    *([] if partitioned else [sa.ForeignKeyConstraint(['record_id'], ['records.id'], name=op.f('fk_descriptions_record_id_records'))]),
+    sa.PrimaryKeyConstraint(*key, name=op.f('pk_descriptions')),
+    **kwargs
+    )
+    op.execute('ALTER SEQUENCE records_id_seq OWNED BY records.id')
+    op.execute('ALTER SEQUENCE descriptions_id_seq OWNED BY descriptions.id')
+
+
+def _copy_data(suffix: str, partitioned: bool) -> None:
+    op.execute(f'INSERT INTO records (id, crawl_id, record_type, created_at, updated_at) SELECT id, crawl_id, record_type, created_at, updated_at FROM records_{suffix}')
+    columns = 'id, published_at, title, price, currency, location, flooring_m_squared, listing_id, current'
+    if partitioned:
+        # The partition key is taken over from the parent record
+        op.execute(f'INSERT INTO real_estate_records ({columns}, created_at) SELECT r.id, r.published_at, r.title, r.price, r.currency, r.location, r.flooring_m_squared, r.listing_id, r.current, p.created_at FROM real_estate_records_{suffix} r JOIN records_{suffix} p ON p.id = r.id')
+    else:
+        op.execute(f'INSERT INTO real_estate_records ({columns}) SELECT {columns} FROM real_estate_records_{suffix}')
+    op.execute(f'INSERT INTO descriptions (id, record_id, current, text, created_at, updated_at) SELECT id, record_id, current, text, created_at, updated_at FROM descriptions_{suffix}')
+    for table in TABLES:
+        # Dropping a partitioned table drops its partitions too
+        op.drop_table(f'{table}_{suffix}')
+
+
+def _create_indexes() -> None:
+    op.create_index(op.f('ix_real_estate_records_listing_id'), 'real_estate_records', ['listing_id'], unique=False)
+    op.create_index('ix_real_estate_records_title_trgm', 'real_estate_records', ['title'], unique=False, postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}, postgresql_where=sa.text('current'))
+    op.create_index('ix_real_estate_records_published_at_id', 'real_estate_records', ['published_at', 'id'], unique=False, postgresql_where=sa.text('current'))
+    op.create_index('ix_real_estate_records_flooring_m_squared', 'real_estate_records', ['flooring_m_squared'], unique=False, postgresql_where=sa.text('current'))
+    op.create_index('ix_real_estate_records_price_flooring_m_squared', 'real_estate_records', ['price', 'flooring_m_squared'], unique=False, postgresql_where=sa.text('current'))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _set_aside('unpartitioned')
+    _create_tables(partitioned=True)
+    op.execute(CREATE_PARTITIONS)
+    _copy_data('unpartitioned', partitioned=True)
+    # Indexes are created once the data is in, on every partition
+    _create_indexes()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.rename_table(table, f'{table}_partitioned')
+        op.execute(f'ALTER TABLE {table}_partitioned RENAME CONSTRAINT pk_{table} TO pk_{table}_partitioned')
+    op.execute('ALTER SEQUENCE records_id_seq OWNED BY NONE')
+    op.execute('ALTER SEQUENCE descriptions_id_seq OWNED BY NONE')
+    for index in ('ix_real_estate_records_listing_id', 'ix_real_estate_records_title_trgm', 'ix_real_estate_records_published_at_id', 'ix_real_estate_records_flooring_m_squared', 'ix_real_estate_records_price_flooring_m_squared'):
+        op.drop_index(index, table_name='real_estate_records_partitioned')
+    _create_tables(partitioned=False)
+    _copy_data('partitioned', partitioned=False)
+    _create_indexes()
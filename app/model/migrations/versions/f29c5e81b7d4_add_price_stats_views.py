@@ -0,0 +1,82 @@
+"""Add price statistics materialized views
+
+Revision ID: f29c5e81b7d4
+Revises: e4b7d09a61c3
+Create Date: 2026-10-18 16:52:30.271846
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f29c5e81b7d4'
+down_revision: Union[str, Sequence[str], None] = 'e4b7d09a61c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Bucket sizes match app.model.models.views
+PRICE_BUCKET_SIZE = 1000000
+FLOORING_BUCKET_SIZE = 10
+
+PRICE_STATS_DAILY = """
+CREATE MATERIALIZED VIEW price_stats_daily AS
+SELECT
+    published_at::date AS day,
+    currency,
+    count(*)::integer AS listings,
+    percentile_cont(0.25) WITHIN GROUP (ORDER BY price)::numeric(12, 2) AS price_p25,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY price)::numeric(12, 2) AS price_median,
+    percentile_cont(0.75) WITHIN GROUP (ORDER BY price)::numeric(12, 2) AS price_p75,
+    percentile_cont(0.9) WITHIN GROUP (ORDER BY price)::numeric(12, 2) AS price_p90,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY price / flooring_m_squared) AS price_per_m2_median,
+    avg(price / flooring_m_squared)::double precision AS price_per_m2_avg
+FROM real_estate_records
+WHERE price IS NOT NULL AND published_at IS NOT NULL
+GROUP BY 1, 2
+"""
+
+PRICE_STATS_BUCKETS = f"""
+CREATE MATERIALIZED VIEW price_stats_buckets AS
+WITH listings AS (
+    SELECT currency, price, flooring_m_squared, price / flooring_m_squared AS price_per_m2
+    FROM real_estate_records
+    WHERE current AND price IS NOT NULL
+)
+SELECT
+    'price'::varchar(16) AS dimension,
+    currency,
+    (floor(price / {PRICE_BUCKET_SIZE}) * {PRICE_BUCKET_SIZE})::numeric(14, 2) AS bucket,
+    count(*)::integer AS listings,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY price)::numeric(12, 2) AS price_median,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY price_per_m2) AS price_per_m2_median
+FROM listings
+GROUP BY 1, 2, 3
+UNION ALL
+SELECT
+    'flooring'::varchar(16),
+    currency,
+    (floor(flooring_m_squared / {FLOORING_BUCKET_SIZE}) * {FLOORING_BUCKET_SIZE})::numeric(14, 2),
+    count(*)::integer,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY price)::numeric(12, 2),
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY price_per_m2)
+FROM listings
+WHERE flooring_m_squared IS NOT NULL
+GROUP BY 1, 2, 3
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(PRICE_STATS_DAILY)
+    op.execute(PRICE_STATS_BUCKETS)
+    # Unique indexes let the views be refreshed concurrently with reads
+    op.create_index('ix_price_stats_daily_day_currency', 'price_stats_daily', ['day', 'currency'], unique=True)
+    op.create_index('ix_price_stats_buckets_dimension_currency_bucket', 'price_stats_buckets', ['dimension', 'currency', 'bucket'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP MATERIALIZED VIEW price_stats_buckets')
+    op.execute('DROP MATERIALIZED VIEW price_stats_daily')
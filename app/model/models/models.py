@@ -2,11 +2,35 @@ from datetime import datetime
 from decimal import Decimal
 
 from typing import Optional
-from sqlalchemy import String, ForeignKey, Numeric, MetaData, CheckConstraint
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    Integer,
+    String,
+    ForeignKey,
+    LargeBinary,
+    Numeric,
+    MetaData,
+    CheckConstraint,
+    Index,
+    UniqueConstraint,
+    and_,
+    text,
+    true,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.orm import (
+    DeclarativeBase,
+    Mapped,
+    column_property,
+    declared_attr,
+    mapped_column,
+    relationship,
+)
 
 from app.domain.utils.time import now
-from app.model.types.enums import RecordType, Currency
+from app.model.types.enums import CrawlJobStatus, RecordType, Currency
 
 convention = {
     "ix": "ix_%(column_0_label)s",
@@ -59,6 +83,7 @@ class Site(SimpleIdMixin, AuditableMixin, Base):
 
     domain: Mapped[Domain] = relationship("Domain", back_populates="sites")
     crawls: Mapped[list["Crawl"]] = relationship("Crawl", back_populates="site")
+    listings: Mapped[list["Listing"]] = relationship("Listing", back_populates="site")
 
 
 class DomainRegulation(SimpleIdMixin, AuditableMixin, Base):
@@ -66,6 +91,12 @@ class DomainRegulation(SimpleIdMixin, AuditableMixin, Base):
 
     domain_id: Mapped[int] = mapped_column(ForeignKey("domains.id"))
     is_allowed: Mapped[bool] = mapped_column()  # If domain is allowed for crawling
+    # Rate policy of the crawler, None keeps the crawler defaults
+    max_requests_per_second: Mapped[Optional[float]] = mapped_column(default=None)
+    max_concurrency: Mapped[Optional[int]] = mapped_column(default=None)
+    backoff_seconds: Mapped[Optional[float]] = mapped_column(
+        default=None
+    )  # Pause after a block, doubles on repeats
 
     domain: Mapped[Domain] = relationship("Domain", back_populates="domain_regulations")
 
@@ -79,25 +110,162 @@ class Crawl(SimpleIdMixin, Base):
     site_id: Mapped[int] = mapped_column(ForeignKey("sites.id"))
     started_at: Mapped[datetime] = mapped_column(default=lambda: now())
     finished_at: Mapped[Optional[datetime]] = mapped_column(default=None)
+    # Set when the crawl re-parsed stored snapshots instead of fetching
+    replay_of_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("crawls.id"), default=None
+    )
+
+    # Filled in when the crawl finishes
+    page_count: Mapped[int] = mapped_column(default=0, server_default=text("0"))
+    record_count: Mapped[int] = mapped_column(default=0, server_default=text("0"))
+    error_count: Mapped[int] = mapped_column(default=0, server_default=text("0"))
+    # Pages which did not change since the last crawl, so were not parsed
+    skipped_page_count: Mapped[int] = mapped_column(default=0, server_default=text("0"))
+    bytes_fetched: Mapped[int] = mapped_column(
+        BigInteger, default=0, server_default=text("0")
+    )
+    # Total seconds spent per stage, e.g. {"navigation": 12.3, "parse": 1.2}
+    timings: Mapped[Optional[dict[str, float]]] = mapped_column(JSONB, default=None)
 
     site: Mapped[Site] = relationship("Site")
     records: Mapped[list["Record"]] = relationship("Record", back_populates="crawl")
+    pages: Mapped[list["CrawlPage"]] = relationship("CrawlPage", back_populates="crawl")
+
+    @property
+    def records_per_second(self) -> float | None:
+        if self.finished_at is None:
+            return None
+        duration = (self.finished_at - self.started_at).total_seconds()
+        return self.record_count / duration if duration > 0 else None
+
+
+class Snapshot(SimpleIdMixin, Base):
+    """zstd compressed HTML, stored once per distinct content"""
+
+    __tablename__ = "snapshots"
+
+    content_hash: Mapped[str] = mapped_column(String(64), unique=True)  # sha256
+    size: Mapped[int] = mapped_column()  # Uncompressed bytes
+    data: Mapped[bytes] = mapped_column(LargeBinary)
+    created_at: Mapped[datetime] = mapped_column(default=lambda: now())
+
+
+class CrawlPage(SimpleIdMixin, Base):
+    """A page fetched by a crawl, pointing to its snapshot"""
+
+    __tablename__ = "crawl_pages"
+
+    crawl_id: Mapped[int] = mapped_column(ForeignKey("crawls.id"), index=True)
+    snapshot_id: Mapped[int] = mapped_column(ForeignKey("snapshots.id"))
+    url: Mapped[str] = mapped_column(String(2048))
+    status: Mapped[Optional[int]] = mapped_column(default=None)
+    fetched_at: Mapped[datetime] = mapped_column(default=lambda: now())
+
+    crawl: Mapped[Crawl] = relationship("Crawl", back_populates="pages")
+    snapshot: Mapped[Snapshot] = relationship("Snapshot")
+
+
+class PageFingerprint(SimpleIdMixin, AuditableMixin, Base):
+    """State of a results page when it was last processed, to skip it if unchanged"""
+
+    __tablename__ = "page_fingerprints"
+
+    site_id: Mapped[int] = mapped_column(ForeignKey("sites.id"), index=True)
+    url: Mapped[str] = mapped_column(String(2048), unique=True)
+    fingerprint: Mapped[str] = mapped_column(String(64))  # sha256 of the listings
+    etag: Mapped[Optional[str]] = mapped_column(String(256), default=None)
+    last_modified: Mapped[Optional[str]] = mapped_column(String(64), default=None)
+    crawl_id: Mapped[int] = mapped_column(ForeignKey("crawls.id"))  # Last seen by
+    # Listings on the page, still seen while the page is skipped as unchanged
+    external_ids: Mapped[list[str]] = mapped_column(
+        ARRAY(String(64)), default=list, server_default=text("'{}'")
+    )
+
+
+# Jobs a worker may claim: queued ones, or running ones whose lease expired
+PENDING_JOB = text("status IN ('queued', 'running')")
+
+
+class CrawlJob(SimpleIdMixin, AuditableMixin, Base):
+    """A crawl of a URL, queued by the scheduler and claimed by a worker"""
+
+    __tablename__ = "crawl_jobs"
+
+    url: Mapped[str] = mapped_column(String(2048))
+    priority: Mapped[int] = mapped_column(
+        default=0, server_default=text("0")
+    )  # Lower runs first
+    status: Mapped[CrawlJobStatus] = mapped_column(
+        String(16), default=CrawlJobStatus.QUEUED.value
+    )
+    run_after: Mapped[datetime] = mapped_column(default=lambda: now())
+    attempts: Mapped[int] = mapped_column(default=0, server_default=text("0"))
+    # Set while running, the worker renews the lease until the job finishes
+    worker: Mapped[Optional[str]] = mapped_column(String(256), default=None)
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(default=None)
+    started_at: Mapped[Optional[datetime]] = mapped_column(default=None)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(default=None)
+    error: Mapped[Optional[str]] = mapped_column(String(2048), default=None)
+
+    __table_args__ = (
+        Index(
+            "ix_crawl_jobs_priority_run_after",
+            "priority",
+            "run_after",
+            postgresql_where=PENDING_JOB,
+        ),
+        # One pending job per URL, so schedulers never queue a crawl twice
+        Index(
+            "uq_crawl_jobs_url_pending",
+            "url",
+            unique=True,
+            postgresql_where=PENDING_JOB,
+        ),
+    )
 
 
 # ### INFO MODELS ### #
 
 
+class Listing(SimpleIdMixin, AuditableMixin, Base):
+    """Stable identity of a listing across crawls, e.g. the bezrealitky ID"""
+
+    __tablename__ = "listings"
+
+    site_id: Mapped[int] = mapped_column(ForeignKey("sites.id"))
+    external_id: Mapped[str] = mapped_column(String(64))
+    last_seen_at: Mapped[datetime] = mapped_column(default=lambda: now())
+
+    site: Mapped[Site] = relationship("Site", back_populates="listings")
+    records: Mapped[list["RealEstateRecord"]] = relationship(
+        "RealEstateRecord", back_populates="listing"
+    )
+
+    __table_args__ = (UniqueConstraint("site_id", "external_id"),)
+
+
+# Record tables are partitioned by month of created_at, see app.model.partitions.
+# Postgres wants the partition key in every primary key, and foreign keys
+# between the partitioned tables would make dropping old partitions slow, so
+# the tables are joined by (id, created_at) without constraints.
+PARTITION_BY_MONTH = {"postgresql_partition_by": "RANGE (created_at)"}
+
+
 class Record(AuditableMixin, Base):
     """Base class for all records. It joins on other types of records"""
 
     # TODO: Do not forget to create record_type for each new record type!
     __tablename__ = "records"
-    id: Mapped[int] = mapped_column(primary_key=True)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    created_at: Mapped[datetime] = mapped_column(
+        primary_key=True, default=lambda: now()
+    )
 
     crawl_id: Mapped[int] = mapped_column(ForeignKey("crawls.id"))
     record_type: Mapped[RecordType] = mapped_column(String(50))
 
     crawl: Mapped[Crawl] = relationship("Crawl")
+    __table_args__ = (PARTITION_BY_MONTH,)
     __mapper_args__ = {
         "polymorphic_identity": "record",
         "polymorphic_on": "record_type",
@@ -107,7 +275,14 @@ class Record(AuditableMixin, Base):
 class RealEstateRecord(Record):
     __tablename__ = "real_estate_records"
 
-    id: Mapped[int] = mapped_column(ForeignKey("records.id"), primary_key=True)
+    # The same values as in records, created_at is the partition key here too
+    id: Mapped[int] = column_property(
+        Column(Integer, primary_key=True, autoincrement=False),
+        Record.__table__.c.id,
+    )
+    created_at: Mapped[datetime] = column_property(
+        Column(DateTime, primary_key=True), Record.__table__.c.created_at
+    )
     published_at: Mapped[Optional[datetime]] = mapped_column(default=None)
     title: Mapped[str] = mapped_column(String(2048))
     price: Mapped[Optional[Decimal]] = mapped_column(
@@ -116,8 +291,21 @@ class RealEstateRecord(Record):
     currency: Mapped[Optional[Currency]] = mapped_column(String(3), default=None)
     flooring_m_squared: Mapped[Optional[float]] = mapped_column(default=None)
     location: Mapped[Optional[str]] = mapped_column(String(2048))
+    listing_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("listings.id"), default=None, index=True
+    )
+    current: Mapped[bool] = mapped_column(
+        default=True, server_default=true()
+    )  # Only the latest version of a listing is current
 
-    descriptions = relationship("Description", back_populates="record")
+    descriptions = relationship(
+        "Description",
+        primaryjoin="RealEstateRecord.id == foreign(Description.record_id)",
+        back_populates="record",
+    )
+    listing: Mapped[Optional[Listing]] = relationship(
+        "Listing", back_populates="records"
+    )
 
     __table_args__ = (
         CheckConstraint("price >= 0", name="check_price_non_negative"),
@@ -125,20 +313,63 @@ class RealEstateRecord(Record):
             "(price IS NULL AND currency IS NULL) OR (price IS NOT NULL AND currency IS NOT NULL)",
             name="check_price_currency_together",
         ),
+        # Search indexes for /query, which only ever looks at current versions
+        Index(
+            "ix_real_estate_records_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+            postgresql_where=text("current"),
+        ),
+        Index(
+            "ix_real_estate_records_flooring_m_squared",
+            "flooring_m_squared",
+            postgresql_where=text("current"),
+        ),
+        Index(
+            "ix_real_estate_records_price_flooring_m_squared",
+            "price",
+            "flooring_m_squared",
+            postgresql_where=text("current"),
+        ),
+        PARTITION_BY_MONTH,
     )
 
-    __mapper_args__ = {
-        "polymorphic_identity": RecordType.REAL_ESTATE.value,
-    }
+    @declared_attr.directive
+    def __mapper_args__(cls):
+        return {
+            "polymorphic_identity": RecordType.REAL_ESTATE.value,
+            "inherit_condition": and_(
+                cls.__table__.c.id == Record.__table__.c.id,
+                cls.__table__.c.created_at == Record.__table__.c.created_at,
+            ),
+        }
+
+
+# In the order of /query, so its pages are read off the index without sorting
+Index(
+    "ix_real_estate_records_published_at_id",
+    RealEstateRecord.__table__.c.published_at.desc().nulls_last(),
+    RealEstateRecord.__table__.c.id.desc(),
+    postgresql_where=text("current"),
+)
 
 
-class Description(SimpleIdMixin, AuditableMixin, Base):
+class Description(AuditableMixin, Base):
     __tablename__ = "descriptions"
 
-    record_id: Mapped[int] = mapped_column(ForeignKey("records.id"))
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    created_at: Mapped[datetime] = mapped_column(
+        primary_key=True, default=lambda: now()
+    )
+    record_id: Mapped[int] = mapped_column()  # records.id, not enforced
     current: Mapped[bool] = mapped_column(
         default=True
     )  # Keep a track of history of descriptions
     text: Mapped[str] = mapped_column(String(16384))
 
-    record: Mapped[Record] = relationship("Record")
+    record: Mapped[Record] = relationship(
+        "Record", primaryjoin="foreign(Description.record_id) == Record.id"
+    )
+
+    __table_args__ = (PARTITION_BY_MONTH,)
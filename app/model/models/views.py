@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Date, Float, Integer, MetaData, Numeric, String, Table
+
+# Materialized views, created by migrations; kept out of Base.metadata so
+# autogenerate does not mistake them for tables
+views_metadata = MetaData()
+
+PRICE_BUCKET_SIZE = 1_000_000  # In the listing currency
+FLOORING_BUCKET_SIZE = 10  # m²
+
+# Prices of new and changed listings per day they were seen, each version once
+price_stats_daily = Table(
+    "price_stats_daily",
+    views_metadata,
+    Column("day", Date, primary_key=True),
+    Column("currency", String(3), primary_key=True),
+    Column("listings", Integer),
+    Column("price_p25", Numeric(12, 2)),
+    Column("price_median", Numeric(12, 2)),
+    Column("price_p75", Numeric(12, 2)),
+    Column("price_p90", Numeric(12, 2)),
+    Column("price_per_m2_median", Float),
+    Column("price_per_m2_avg", Float),
+)
+
+# Current listings by price or flooring bucket, `bucket` is its lower bound
+price_stats_buckets = Table(
+    "price_stats_buckets",
+    views_metadata,
+    Column("dimension", String(16), primary_key=True),  # price or flooring
+    Column("currency", String(3), primary_key=True),
+    Column("bucket", Numeric(14, 2), primary_key=True),
+    Column("listings", Integer),
+    Column("price_median", Numeric(12, 2)),
+    Column("price_per_m2_median", Float),
+)
+
+MATERIALIZED_VIEWS = (price_stats_daily, price_stats_buckets)
@@ -0,0 +1,124 @@
+from datetime import date, datetime
+import logging
+import os
+import re
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domain.utils.time import now
+
+logger = logging.getLogger(__name__)
+
+# Partitioned by month of created_at, see the models
+PARTITIONED_TABLES = ("records", "real_estate_records", "descriptions")
+PARTITION_RE = re.compile(rf"^({'|'.join(PARTITIONED_TABLES)})_y(\d{{4}})m(\d{{2}})$")
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+
+# Serializes partition management between crawler processes
+_LOCK_ID = 7_340_032
+
+
+def month_start(day: date | datetime) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month:%Y}m{month:%m}"
+
+
+async def ensure_partitions(
+    session: AsyncSession, months_ahead: int = PARTITION_MONTHS_AHEAD
+) -> list[str]:
+    """Create the partitions of this month and `months_ahead` next ones.
+
+    Rows outside of all partitions cannot be inserted, so this runs before
+    every crawl; it is a single query when the partitions exist.
+    """
+    current = month_start(now())
+    wanted = {
+        partition_name(table, month): (table, month)
+        for month in (add_months(current, i) for i in range(months_ahead + 1))
+        for table in PARTITIONED_TABLES
+    }
+    missing = (
+        await session.execute(
+            text(
+                "SELECT name FROM unnest(CAST(:names AS text[])) name "
+                "WHERE to_regclass(name) IS NULL"
+            ),
+            {"names": list(wanted)},
+        )
+    ).scalars()
+    if not (missing := list(missing)):
+        return []
+
+    await session.execute(text(f"SELECT pg_advisory_xact_lock({_LOCK_ID})"))
+    for name in missing:
+        table, month = wanted[name]
+        await session.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+            )
+        )
+        logger.info(f"Created partition {name}")
+    return missing
+
+
+async def list_partitions(session: AsyncSession) -> list[tuple[str, str, date]]:
+    """Attached monthly partitions as (name, parent table, month), oldest first."""
+    result = await session.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "WHERE parent.relname = ANY(CAST(:tables AS text[]))"
+        ),
+        {"tables": list(PARTITIONED_TABLES)},
+    )
+    partitions = []
+    for name in result.scalars():
+        if match := PARTITION_RE.match(name):
+            table, year, month = match.groups()
+            partitions.append((name, table, date(int(year), int(month), 1)))
+    return sorted(partitions, key=lambda partition: partition[2])
+
+
+async def retire_partitions(
+    session: AsyncSession, before: date, drop: bool = False, force: bool = False
+) -> list[str]:
+    """Detach, and optionally drop, the partitions of months before `before`.
+
+    Detaching or dropping a partition is a catalog change, no matter how many
+    rows it holds. Months which still hold the current version of a listing
+    are kept unless `force`d, as the API would lose that listing.
+    """
+    candidates = [
+        partition
+        for partition in await list_partitions(session)
+        if partition[2] < month_start(before)
+    ]
+
+    kept = set()
+    for name, table, month in candidates:
+        if table == "real_estate_records" and not force:
+            stmt = text(f"SELECT EXISTS (SELECT 1 FROM {name} WHERE current)")
+            if (await session.execute(stmt)).scalar():
+                logger.warning(f"Keeping {month:%Y-%m}, it has current records")
+                kept.add(month)
+
+    retired = []
+    for name, table, month in candidates:
+        if month in kept:
+            continue
+        await session.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        if drop:
+            await session.execute(text(f"DROP TABLE {name}"))
+        retired.append(name)
+    return retired
@@ -1,19 +1,28 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 import os
-from dotenv import load_dotenv
 from contextlib import asynccontextmanager
 
-load_dotenv()
+from app.model.settings import DatabaseSettings
 
 POSTGRES_HOST = os.getenv("POSTGRES_HOST")
 POSTGRES_PORT = os.getenv("POSTGRES_PORT")
 POSTGRES_USER = os.getenv("POSTGRES_USER")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD")
 POSTGRES_DB = os.getenv("POSTGRES_DB")
+DB_PROFILE = os.getenv("DB_PROFILE", "crawler")  # crawler or api
 
 DATABASE_URL = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+settings = DatabaseSettings.from_env(DB_PROFILE)
+
+engine = create_async_engine(
+    f"{DATABASE_URL}?prepared_statement_cache_size={settings.prepared_statement_cache_size}",
+    echo=settings.echo,
+    pool_size=settings.pool_size,
+    max_overflow=settings.max_overflow,
+    pool_recycle=settings.pool_recycle,
+    pool_pre_ping=settings.pool_pre_ping,
+)
 
 AsyncSessionLocal = async_sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
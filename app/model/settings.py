@@ -0,0 +1,42 @@
+from dataclasses import dataclass, fields, replace
+import os
+
+
+@dataclass(frozen=True)
+class DatabaseSettings:
+    """Async engine and connection pool settings."""
+
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_recycle: int = 1800  # Seconds before a connection is replaced
+    pool_pre_ping: bool = True
+    prepared_statement_cache_size: int = 100  # Per connection, 0 disables it
+    echo: bool = False
+
+    @classmethod
+    def from_env(cls, profile: str) -> "DatabaseSettings":
+        """Profile defaults overridden by DB_<FIELD> and DB_<PROFILE>_<FIELD>."""
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown database profile: {profile}")
+
+        settings = PROFILES[profile]
+        overrides = {}
+        for field in fields(cls):
+            for name in (f"DB_{field.name}", f"DB_{profile}_{field.name}"):
+                if (value := os.getenv(name.upper())) is not None:
+                    overrides[field.name] = _cast(field.type, value)
+        return replace(settings, **overrides)
+
+
+def _cast(type_, value: str):
+    if type_ in (bool, "bool"):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return int(value)
+
+
+PROFILES = {
+    # Few concurrent crawls, mostly bulk writes
+    "crawler": DatabaseSettings(pool_size=5, max_overflow=5),
+    # Many short concurrent reads
+    "api": DatabaseSettings(pool_size=20, max_overflow=20, pool_recycle=900),
+}
@@ -14,3 +14,12 @@ class Currency(enum.Enum):
     EUR = "EUR"
     GBP = "GBP"
     CZK = "CZK"
+
+
+class CrawlJobStatus(enum.Enum):
+    """Enum for crawl job states."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
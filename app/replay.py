@@ -0,0 +1,80 @@
+"""Re-parse stored page snapshots and ingest the results, without fetching.
+
+Usage: python -m app.replay [CRAWL_ID ...]
+
+Without ids the latest crawl of every site is replayed. Each replay is stored
+as a new crawl pointing to the original one. Crawls are replayed one by one,
+as replaying an older crawl after a newer one would make its data current
+again, while the pages of a crawl are parsed in parallel.
+"""
+
+import argparse
+import asyncio
+import logging
+
+from sqlalchemy import func, select
+
+from app.domain.crawler.executors import get_parse_executor
+from app.domain.crawler.registry import crawler_registry
+from app.model.models.models import Crawl, CrawlPage, Site
+from app.model.session import aget_session
+from app.service.crawls import run_pipeline
+from app.service.snapshots import iter_snapshots
+
+logger = logging.getLogger(__name__)
+
+
+async def latest_crawl_ids() -> list[int]:
+    """Latest crawl with stored pages for every site, replays not counted."""
+    stmt = (
+        select(func.max(Crawl.id))
+        .where(
+            Crawl.replay_of_id.is_(None),
+            select(CrawlPage.id).where(CrawlPage.crawl_id == Crawl.id).exists(),
+        )
+        .group_by(Crawl.site_id)
+    )
+    async with aget_session() as session:
+        return sorted((await session.execute(stmt)).scalars().all())
+
+
+async def replay_crawl(crawl_id: int):
+    async with aget_session() as session:
+        stmt = (
+            select(Crawl.site_id, Site.url)
+            .join(Site, Crawl.site_id == Site.id)
+            .where(Crawl.id == crawl_id)
+        )
+        if (row := (await session.execute(stmt)).one_or_none()) is None:
+            raise ValueError(f"Crawl {crawl_id} does not exist")
+        site_id, site_url = row
+        parser = crawler_registry.get(site_url).parser_cls
+        replay = Crawl(site_id=site_id, replay_of_id=crawl_id)
+        session.add(replay)
+        await session.commit()
+
+    async def open_pages():
+        async with aget_session() as session:
+            async for page in iter_snapshots(session, crawl_id):
+                yield page
+
+    logger.info(f"Replaying crawl {crawl_id} of {site_url} as crawl {replay.id}")
+    return await run_pipeline(replay, site_url, open_pages, parser)
+
+
+async def replay(crawl_ids: list[int]):
+    try:
+        for crawl_id in crawl_ids or await latest_crawl_ids():
+            try:
+                await replay_crawl(crawl_id)
+            except LookupError as e:
+                logger.error(f"Not replaying crawl {crawl_id}: {e}")
+    finally:
+        await get_parse_executor().shutdown()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("crawl_ids", nargs="*", type=int, metavar="CRAWL_ID")
+    asyncio.run(replay(parser.parse_args().crawl_ids))
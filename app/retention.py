@@ -0,0 +1,38 @@
+"""Retire monthly partitions of the record tables older than a retention period.
+
+Usage: python -m app.retention --keep-months 12 [--drop] [--force]
+
+Partitions are detached, so they can be archived, or dropped with --drop.
+Months which still hold current versions of listings are kept unless --force.
+"""
+
+import argparse
+import asyncio
+import logging
+
+from app.domain.utils.time import now
+from app.model.partitions import add_months, month_start, retire_partitions
+from app.model.session import aget_session
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def retain(keep_months: int, drop: bool, force: bool):
+    before = add_months(month_start(now()), -keep_months)
+    async with aget_session() as session:
+        retired = await retire_partitions(session, before, drop=drop, force=force)
+        await session.commit()
+    action = "Dropped" if drop else "Detached"
+    logger.info(f"{action} {len(retired)} partitions before {before}: {retired}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keep-months", type=int, required=True)
+    parser.add_argument("--drop", action="store_true", help="drop, not only detach")
+    parser.add_argument(
+        "--force", action="store_true", help="retire months with current records"
+    )
+    args = parser.parse_args()
+    asyncio.run(retain(args.keep_months, args.drop, args.force))
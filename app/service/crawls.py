@@ -0,0 +1,118 @@
+from typing import AsyncIterator, Callable
+from urllib.parse import urlparse
+import logging
+import time
+
+from sqlalchemy import update
+
+from app.domain.crawler.engines import FetchResult
+from app.domain.crawler.executors import get_parse_executor
+from app.domain.utils.time import now
+from app.model.models.models import Crawl
+from app.model.partitions import ensure_partitions
+from app.model.session import aget_session
+from app.service.fingerprints import ChangeDetector, save_fingerprints
+from app.service.ingest import touch_listings, upsert_real_estate_records
+from app.service.metrics import observe_crawl
+from app.service.pipeline import CrawlPipeline, PipelineStats
+from app.service.snapshots import store_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+async def run_pipeline(
+    crawl: Crawl,
+    label: str,
+    open_pages: Callable[[], AsyncIterator[FetchResult]],
+    parser: type,
+    archive: bool = False,
+    detector: ChangeDetector | None = None,
+):
+    """Parse the pages with `parser` and store them into `crawl`, then record its stats.
+
+    With a `detector`, pages unchanged since the last crawl are skipped.
+    """
+    async with aget_session() as session:
+        # Records are written to the partition of the current month
+        await ensure_partitions(session)
+        await session.commit()
+
+    parse_executor = get_parse_executor()
+
+    async def parse(html: str):
+        return await parse_executor.parse(parser, html)
+
+    async def write(batch: list[dict]):
+        async with aget_session() as session:
+            stored = await upsert_real_estate_records(
+                session, crawl.site_id, crawl.id, batch
+            )
+            await session.commit()
+        logger.info(
+            f"Stored {len(batch)} records for {label}: {stored.inserted} new, "
+            f"{stored.changed} changed, {stored.unchanged} unchanged"
+        )
+        return stored
+
+    async def store(page: FetchResult):
+        async with aget_session() as session:
+            await store_snapshot(session, crawl.id, page)
+            await session.commit()
+
+    start = time.perf_counter()
+    pipeline = None
+    try:
+        pipeline = CrawlPipeline(
+            pages=open_pages(),
+            parse=parse,
+            write=write,
+            archive=store if archive else None,
+            unchanged=detector.is_unchanged if detector is not None else None,
+            parsed=detector.parsed if detector is not None else None,
+        )
+        await pipeline.run()
+        if detector is not None:
+            # Only now the pages are stored, so they can be skipped next time
+            async with aget_session() as session:
+                await save_fingerprints(
+                    session,
+                    crawl.site_id,
+                    crawl.id,
+                    detector.processed(failed=pipeline.stats.failed_urls),
+                )
+                await touch_listings(session, crawl.site_id, detector.unchanged_ids)
+                await session.commit()
+    except Exception as e:
+        logger.error(f"Error during crawling: {e}")
+        if pipeline is not None:
+            pipeline.stats.add_error("crawl")
+    finally:
+        stats = pipeline.stats if pipeline is not None else PipelineStats(errors=1)
+        # Marks the data as changed, e.g. for the API response cache
+        async with aget_session() as session:
+            await session.execute(
+                update(Crawl)
+                .where(Crawl.id == crawl.id)
+                .values(
+                    finished_at=now(),
+                    page_count=stats.pages,
+                    record_count=stats.records,
+                    error_count=stats.errors,
+                    skipped_page_count=stats.skipped,
+                    bytes_fetched=stats.bytes_fetched,
+                    timings=dict(stats.timings),
+                )
+            )
+            await session.commit()
+
+    duration = time.perf_counter() - start
+    observe_crawl(urlparse(label).netloc or label, duration, stats.records)
+    timings = ", ".join(f"{stage} {sec:.1f}s" for stage, sec in stats.timings.items())
+    logger.info(
+        f"Crawl completed for {label} in {duration:.1f}s: {stats.pages} pages "
+        f"({stats.bytes_fetched} bytes, {stats.skipped} unchanged), "
+        f"{stats.records} records ({stats.records / duration:.1f}/s) "
+        f"in {stats.batches} batches, "
+        f"{stats.errors} errors. Stage times: {timings or 'none'}."
+    )
+    return stats
@@ -0,0 +1,134 @@
+from typing import Any, Awaitable, Callable, Iterable, NamedTuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domain.crawler.engines import FetchResult, Validators
+from app.domain.utils.time import now
+from app.model.models.models import PageFingerprint
+
+fingerprints_table = PageFingerprint.__table__
+
+
+class PageState(NamedTuple):
+    fingerprint: str
+    etag: str | None = None
+    last_modified: str | None = None
+    external_ids: tuple[str, ...] = ()  # Of the listings on the page
+
+
+class ChangeDetector:
+    """Tells which results pages did not change since the last crawl.
+
+    A page is unchanged when the server answers a conditional request with
+    304, or when the hash of its listing section equals the stored one. The
+    listings of unchanged pages are collected in `unchanged_ids`, as they were
+    seen even though the pages are not parsed.
+    """
+
+    def __init__(
+        self,
+        previous: dict[str, PageState],
+        fingerprint: Callable[[str], Awaitable[str]],
+    ):
+        self.previous = previous
+        self.fingerprint = fingerprint  # Hashes the listing section of a page
+        self.seen: dict[str, PageState] = {}
+        self.unchanged_ids: set[str] = set()
+
+    def validators(self, url: str) -> Validators | None:
+        if (state := self.previous.get(url)) is None:
+            return None
+        if state.etag is None and state.last_modified is None:
+            return None
+        return Validators(state.etag, state.last_modified)
+
+    async def is_unchanged(self, page: FetchResult) -> bool:
+        previous = self.previous.get(page.url)
+        if page.not_modified:
+            # Only pages sent with validators of a stored state get a 304
+            unchanged = previous is not None
+        else:
+            validators = page.validators or Validators()
+            state = PageState(
+                await self.fingerprint(page.html),
+                validators.etag,
+                validators.last_modified,
+            )
+            unchanged = (
+                previous is not None and previous.fingerprint == state.fingerprint
+            )
+            if unchanged:
+                state = state._replace(external_ids=previous.external_ids)
+            self.seen[page.url] = state
+        if unchanged:
+            self.unchanged_ids.update(previous.external_ids)
+        return unchanged
+
+    def parsed(self, page: FetchResult, items: list[dict[str, Any]]):
+        """Remember the listings of a parsed page, with its state."""
+        if (state := self.seen.get(page.url)) is not None:
+            external_ids = (item.get("description") for item in items)
+            self.seen[page.url] = state._replace(
+                external_ids=tuple(dict.fromkeys(filter(None, external_ids)))
+            )
+
+    def processed(self, failed: Iterable[str] = ()) -> dict[str, PageState]:
+        """States to store, pages which failed must be processed next time."""
+        failed = set(failed)
+        return {url: state for url, state in self.seen.items() if url not in failed}
+
+
+async def load_fingerprints(
+    session: AsyncSession, site_id: int
+) -> dict[str, PageState]:
+    stmt = select(
+        PageFingerprint.url,
+        PageFingerprint.fingerprint,
+        PageFingerprint.etag,
+        PageFingerprint.last_modified,
+        PageFingerprint.external_ids,
+    ).where(PageFingerprint.site_id == site_id)
+    result = await session.execute(stmt)
+    return {
+        url: PageState(fingerprint, etag, last_modified, tuple(external_ids))
+        for url, fingerprint, etag, last_modified, external_ids in result.tuples()
+    }
+
+
+async def save_fingerprints(
+    session: AsyncSession, site_id: int, crawl_id: int, states: dict[str, PageState]
+):
+    if not states:
+        return
+    timestamp = now()
+    stmt = pg_insert(fingerprints_table).values(
+        [
+            {
+                "site_id": site_id,
+                "url": url,
+                "fingerprint": state.fingerprint,
+                "etag": state.etag,
+                "last_modified": state.last_modified,
+                "external_ids": list(state.external_ids),
+                "crawl_id": crawl_id,
+                "created_at": timestamp,
+                "updated_at": timestamp,
+            }
+            for url, state in states.items()
+        ]
+    )
+    await session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[fingerprints_table.c.url],
+            set_={
+                "fingerprint": stmt.excluded.fingerprint,
+                "etag": stmt.excluded.etag,
+                "last_modified": stmt.excluded.last_modified,
+                "external_ids": stmt.excluded.external_ids,
+                "crawl_id": stmt.excluded.crawl_id,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+    )
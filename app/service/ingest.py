@@ -0,0 +1,297 @@
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Iterable
+from datetime import datetime
+
+from sqlalchemy import insert, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domain.utils.time import now
+from app.model.models.models import Description, Listing, RealEstateRecord, Record
+from app.model.types.enums import RecordType
+
+# Above this batch size COPY beats multi-row INSERT ... RETURNING
+COPY_THRESHOLD = 5000
+
+records_table = Record.__table__
+real_estate_table = RealEstateRecord.__table__
+descriptions_table = Description.__table__
+listings_table = Listing.__table__
+
+
+def _real_estate_row(
+    record_id: int, item: dict[str, Any], published_at: datetime
+) -> dict[str, Any]:
+    price = item.get("price")
+    return {
+        "id": record_id,
+        "created_at": published_at,  # Must equal records.created_at
+        "published_at": published_at,
+        "title": item["title"],
+        "price": None if price is None else Decimal(price),
+        # Currency must be empty when there is no price (check constraint)
+        "currency": None if price is None else item.get("currency"),
+        "flooring_m_squared": item.get("flooring_m_squared"),
+        "location": item.get("location"),
+        "listing_id": item.get("listing_id"),
+        "current": True,
+    }
+
+
+def _description_rows(
+    record_ids: Iterable[int], items: Iterable[dict[str, Any]], timestamp: datetime
+) -> list[dict[str, Any]]:
+    return [
+        {
+            "record_id": record_id,
+            "current": True,
+            "text": item["description"],
+            "created_at": timestamp,
+            "updated_at": timestamp,
+        }
+        for record_id, item in zip(record_ids, items)
+        if item.get("description") is not None
+    ]
+
+
+async def insert_real_estate_records(
+    session: AsyncSession, crawl_id: int, items: list[dict[str, Any]]
+) -> list[int]:
+    """Insert parsed items with batched INSERT ... RETURNING statements."""
+    if not items:
+        return []
+
+    timestamp = now()
+    result = await session.execute(
+        insert(records_table).returning(
+            records_table.c.id, sort_by_parameter_order=True
+        ),
+        [
+            {
+                "crawl_id": crawl_id,
+                "record_type": RecordType.REAL_ESTATE.value,
+                "created_at": timestamp,
+                "updated_at": timestamp,
+            }
+            for _ in items
+        ],
+    )
+    record_ids = list(result.scalars().all())
+
+    await session.execute(
+        insert(real_estate_table),
+        [
+            _real_estate_row(record_id, item, timestamp)
+            for record_id, item in zip(record_ids, items)
+        ],
+    )
+    if descriptions := _description_rows(record_ids, items, timestamp):
+        await session.execute(insert(descriptions_table), descriptions)
+    return record_ids
+
+
+async def copy_real_estate_records(
+    session: AsyncSession, crawl_id: int, items: list[dict[str, Any]]
+) -> list[int]:
+    """Insert parsed items with asyncpg COPY, within the session transaction."""
+    if not items:
+        return []
+
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    driver = raw_connection.driver_connection
+
+    # Ids are reserved upfront, so child rows can reference them in COPY
+    record_ids = [
+        row[0]
+        for row in await driver.fetch(
+            "SELECT nextval(pg_get_serial_sequence('records', 'id')) "
+            "FROM generate_series(1, $1)",
+            len(items),
+        )
+    ]
+    timestamp = now()
+
+    await driver.copy_records_to_table(
+        records_table.name,
+        columns=["id", "crawl_id", "record_type", "created_at", "updated_at"],
+        records=[
+            (record_id, crawl_id, RecordType.REAL_ESTATE.value, timestamp, timestamp)
+            for record_id in record_ids
+        ],
+    )
+
+    columns = [
+        "id",
+        "created_at",
+        "published_at",
+        "title",
+        "price",
+        "currency",
+        "flooring_m_squared",
+        "location",
+        "listing_id",
+        "current",
+    ]
+    await driver.copy_records_to_table(
+        real_estate_table.name,
+        columns=columns,
+        records=[
+            tuple(_real_estate_row(record_id, item, timestamp)[c] for c in columns)
+            for record_id, item in zip(record_ids, items)
+        ],
+    )
+
+    columns = ["record_id", "current", "text", "created_at", "updated_at"]
+    await driver.copy_records_to_table(
+        descriptions_table.name,
+        columns=columns,
+        records=[
+            tuple(row[c] for c in columns)
+            for row in _description_rows(record_ids, items, timestamp)
+        ],
+    )
+    return record_ids
+
+
+async def ingest_real_estate_records(
+    session: AsyncSession, crawl_id: int, items: list[dict[str, Any]]
+) -> list[int]:
+    """Bulk insert parsed real estate items, picking the fastest write path."""
+    if len(items) >= COPY_THRESHOLD:
+        return await copy_real_estate_records(session, crawl_id, items)
+    return await insert_real_estate_records(session, crawl_id, items)
+
+
+@dataclass
+class UpsertResult:
+    inserted: int = 0
+    changed: int = 0
+    unchanged: int = 0
+
+
+def _fingerprint(title, price, flooring_m_squared) -> tuple:
+    """Fields which make a new version of a listing when they change."""
+    return (
+        title,
+        None if price is None else Decimal(price).quantize(Decimal("0.01")),
+        None if flooring_m_squared is None else round(flooring_m_squared, 2),
+    )
+
+
+async def upsert_real_estate_records(
+    session: AsyncSession, site_id: int, crawl_id: int, items: list[dict[str, Any]]
+) -> UpsertResult:
+    """Store parsed items, writing a new record version only for changed listings.
+
+    Listings are identified by the site specific ID stored in `description`.
+    Unchanged listings only get their `last_seen_at` bumped.
+    """
+    result = UpsertResult()
+    anonymous = [item for item in items if not item.get("description")]
+    by_external_id = {
+        item["description"]: item for item in items if item.get("description")
+    }
+
+    if by_external_id:
+        timestamp = now()
+        listing_ids = dict(
+            (
+                await session.execute(
+                    pg_insert(listings_table)
+                    .on_conflict_do_update(
+                        index_elements=["site_id", "external_id"],
+                        set_={"last_seen_at": timestamp, "updated_at": timestamp},
+                    )
+                    .returning(listings_table.c.external_id, listings_table.c.id),
+                    [
+                        {
+                            "site_id": site_id,
+                            "external_id": external_id,
+                            "last_seen_at": timestamp,
+                            "created_at": timestamp,
+                            "updated_at": timestamp,
+                        }
+                        # Rows are locked in this order, sorted like in any
+                        # other batch so that concurrent crawls cannot deadlock
+                        for external_id in sorted(by_external_id)
+                    ],
+                )
+            ).all()
+        )
+
+        current_versions = {
+            row.listing_id: row
+            for row in await session.execute(
+                select(
+                    RealEstateRecord.listing_id,
+                    RealEstateRecord.id,
+                    RealEstateRecord.created_at,
+                    RealEstateRecord.title,
+                    RealEstateRecord.price,
+                    RealEstateRecord.flooring_m_squared,
+                ).where(
+                    RealEstateRecord.listing_id.in_(listing_ids.values()),
+                    RealEstateRecord.current.is_(True),
+                )
+            )
+        }
+
+        new_versions, superseded = [], []
+        for external_id, item in by_external_id.items():
+            listing_id = listing_ids[external_id]
+            previous = current_versions.get(listing_id)
+            if previous is None:
+                result.inserted += 1
+            elif _fingerprint(
+                previous.title, previous.price, previous.flooring_m_squared
+            ) != _fingerprint(
+                item["title"], item.get("price"), item.get("flooring_m_squared")
+            ):
+                result.changed += 1
+                superseded.append((previous.id, previous.created_at))
+            else:
+                result.unchanged += 1
+                continue
+            new_versions.append({**item, "listing_id": listing_id})
+
+        if superseded:
+            await session.execute(
+                update(real_estate_table)
+                # With the partition key only the right partitions are touched
+                .where(
+                    tuple_(real_estate_table.c.id, real_estate_table.c.created_at).in_(
+                        superseded
+                    )
+                ).values(current=False)
+            )
+        await ingest_real_estate_records(session, crawl_id, new_versions)
+
+    await ingest_real_estate_records(session, crawl_id, anonymous)
+    result.inserted += len(anonymous)
+    return result
+
+
+async def touch_listings(
+    session: AsyncSession, site_id: int, external_ids: Iterable[str]
+):
+    """Bump `last_seen_at` of listings seen on pages which were not parsed."""
+    if not (external_ids := list(external_ids)):
+        return
+    timestamp = now()
+    # Locked in external_id order first, like upsert_real_estate_records does
+    locked = (
+        select(listings_table.c.id)
+        .where(
+            listings_table.c.site_id == site_id,
+            listings_table.c.external_id.in_(external_ids),
+        )
+        .order_by(listings_table.c.external_id)
+        .with_for_update()
+    )
+    await session.execute(
+        update(listings_table)
+        .where(listings_table.c.id.in_(locked.scalar_subquery()))
+        .values(last_seen_at=timestamp, updated_at=timestamp)
+    )
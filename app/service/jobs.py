@@ -0,0 +1,272 @@
+from datetime import timedelta
+from typing import Any, Awaitable, Callable
+import asyncio
+import logging
+import os
+import socket
+
+from sqlalchemy import DateTime, and_, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domain.scheduler.schedulers import StoppableLoop
+from app.model.models.models import PENDING_JOB, CrawlJob
+from app.model.session import aget_session
+from app.model.types.enums import CrawlJobStatus
+
+logger = logging.getLogger(__name__)
+
+CRAWL_JOB_LEASE = timedelta(seconds=float(os.getenv("CRAWL_JOB_LEASE", "300")))
+CRAWL_JOB_MAX_ATTEMPTS = int(os.getenv("CRAWL_JOB_MAX_ATTEMPTS", "3"))
+CRAWL_JOB_RETRY_DELAY = timedelta(
+    seconds=float(os.getenv("CRAWL_JOB_RETRY_DELAY", "600"))
+)
+CRAWL_WORKER_CONCURRENCY = int(os.getenv("CRAWL_WORKER_CONCURRENCY", "4"))
+CRAWL_WORKER_POLL_INTERVAL = timedelta(
+    seconds=float(os.getenv("CRAWL_WORKER_POLL_INTERVAL", "5"))
+)
+
+QUEUED = CrawlJobStatus.QUEUED.value
+RUNNING = CrawlJobStatus.RUNNING.value
+DONE = CrawlJobStatus.DONE.value
+FAILED = CrawlJobStatus.FAILED.value
+
+# Leases are granted and checked by the database clock, as the clocks of the
+# workers may drift apart; naive UTC like the other timestamps
+DB_NOW = func.timezone("UTC", func.now(), type_=DateTime)
+
+
+async def enqueue_job(session: AsyncSession, url: str, priority: int = 0) -> bool:
+    """Queue a crawl of `url`, False if one is already queued or running."""
+    stmt = (
+        pg_insert(CrawlJob)
+        .values(url=url, priority=priority, status=QUEUED, run_after=DB_NOW)
+        .on_conflict_do_nothing(index_elements=["url"], index_where=PENDING_JOB)
+        .returning(CrawlJob.id)
+    )
+    return (await session.execute(stmt)).scalar() is not None
+
+
+async def claim_job(
+    session: AsyncSession, worker: str, lease: timedelta = CRAWL_JOB_LEASE
+) -> CrawlJob | None:
+    """Lease the next due job to `worker`.
+
+    Jobs are locked with SKIP LOCKED, so concurrent workers never claim the
+    same one. Running jobs whose lease expired are claimed again, their worker
+    is presumed dead, unless they ran out of attempts.
+    """
+    expired = and_(CrawlJob.status == RUNNING, CrawlJob.lease_expires_at < DB_NOW)
+    await session.execute(
+        update(CrawlJob)
+        .where(expired, CrawlJob.attempts >= CRAWL_JOB_MAX_ATTEMPTS)
+        .values(status=FAILED, finished_at=DB_NOW, error="Lease expired")
+    )
+
+    due = (
+        select(CrawlJob.id)
+        .where(
+            or_(
+                and_(CrawlJob.status == QUEUED, CrawlJob.run_after <= DB_NOW),
+                and_(expired, CrawlJob.attempts < CRAWL_JOB_MAX_ATTEMPTS),
+            )
+        )
+        .order_by(CrawlJob.priority, CrawlJob.run_after)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    stmt = (
+        update(CrawlJob)
+        .where(CrawlJob.id == due)
+        .values(
+            status=RUNNING,
+            worker=worker,
+            attempts=CrawlJob.attempts + 1,
+            lease_expires_at=DB_NOW + lease,
+            started_at=DB_NOW,
+            updated_at=DB_NOW,
+        )
+        .returning(CrawlJob)
+    )
+    return (await session.execute(stmt)).scalar_one_or_none()
+
+
+async def renew_lease(
+    session: AsyncSession, job_id: int, worker: str, lease: timedelta = CRAWL_JOB_LEASE
+) -> bool:
+    """Extend the lease, False if the job was taken over by another worker."""
+    stmt = (
+        update(CrawlJob)
+        .where(
+            CrawlJob.id == job_id,
+            CrawlJob.worker == worker,
+            CrawlJob.status == RUNNING,
+        )
+        .values(lease_expires_at=DB_NOW + lease, updated_at=DB_NOW)
+        .returning(CrawlJob.id)
+    )
+    return (await session.execute(stmt)).scalar() is not None
+
+
+async def finish_job(
+    session: AsyncSession, job_id: int, worker: str, error: str | None = None
+):
+    """Mark the job done, or queue it again after a delay if it failed."""
+    owned = and_(CrawlJob.id == job_id, CrawlJob.worker == worker)
+    if error is None:
+        values = {"status": DONE, "finished_at": DB_NOW, "error": None}
+        await session.execute(update(CrawlJob).where(owned).values(**values))
+        return
+
+    error = error[:2048]
+    await session.execute(
+        update(CrawlJob)
+        .where(owned, CrawlJob.attempts < CRAWL_JOB_MAX_ATTEMPTS)
+        .values(
+            status=QUEUED,
+            worker=None,
+            run_after=DB_NOW + CRAWL_JOB_RETRY_DELAY,
+            error=error,
+        )
+    )
+    await session.execute(
+        update(CrawlJob)
+        .where(owned, CrawlJob.status == RUNNING)
+        .values(status=FAILED, finished_at=DB_NOW, error=error)
+    )
+
+
+async def release_job(session: AsyncSession, job_id: int, worker: str):
+    """Give an interrupted job back to the queue, without using up an attempt."""
+    await session.execute(
+        update(CrawlJob)
+        .where(
+            CrawlJob.id == job_id,
+            CrawlJob.worker == worker,
+            CrawlJob.status == RUNNING,
+        )
+        .values(
+            status=QUEUED,
+            worker=None,
+            attempts=CrawlJob.attempts - 1,
+            run_after=DB_NOW,
+        )
+    )
+
+
+class CrawlWorker(StoppableLoop):
+    """Claims crawl jobs from the queue and runs them, until stopped.
+
+    Any number of workers on any number of machines can share the queue. A
+    claimed job is leased and the lease is renewed while the job runs, so the
+    jobs of a worker which died are taken over once their leases expire.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[..., Awaitable[Any]],
+        concurrency: int = CRAWL_WORKER_CONCURRENCY,
+        lease: timedelta = CRAWL_JOB_LEASE,
+        poll_interval: timedelta = CRAWL_WORKER_POLL_INTERVAL,
+        on_stop: list[Callable[[], Awaitable[Any]]] | None = None,
+        name: str | None = None,
+        on_start: list[Callable[[], Awaitable[Any]]] | None = None,
+    ):
+        if not asyncio.iscoroutinefunction(callback):
+            raise ValueError("Callback must be an asynchronous function")
+        if concurrency < 1:
+            raise ValueError("Concurrency must be positive")
+
+        super().__init__(on_start, on_stop)
+        self.callback = callback
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self._slots = asyncio.Semaphore(concurrency)
+        self._tasks: set[asyncio.Task] = set()
+
+    async def _claim(self) -> CrawlJob | None:
+        async with aget_session() as session:
+            job = await claim_job(session, self.name, self.lease)
+            await session.commit()
+        return job
+
+    async def _renew(self, job: CrawlJob) -> bool | None:
+        """Extend the lease, False if it was lost, None if that is unknown."""
+        try:
+            async with aget_session() as session:
+                renewed = await renew_lease(session, job.id, self.name, self.lease)
+                await session.commit()
+            return renewed
+        except Exception as e:
+            logger.error(f"Failed to renew the lease of job {job.id}: {e}")
+            return None
+
+    async def _run_job(self, job: CrawlJob, leased_at: float):
+        """Run a job claimed at `leased_at`, by the event loop clock."""
+        logger.info(f"Worker {self.name} running job {job.id} for {job.url}")
+        loop = asyncio.get_running_loop()
+        lease = self.lease.total_seconds()
+        crawl = asyncio.create_task(self.callback(url=job.url))
+        try:
+            # Heartbeat three times per lease, so one missed beat is harmless
+            while not (await asyncio.wait({crawl}, timeout=lease / 3))[0]:
+                beat = loop.time()
+                if renewed := await self._renew(job):
+                    leased_at = beat
+                elif renewed is False or loop.time() >= leased_at + lease:
+                    # Another worker may claim the job by now, it must not run twice
+                    logger.warning(f"Lost the lease of job {job.id}, cancelling it")
+                    crawl.cancel()
+                    await asyncio.gather(crawl, return_exceptions=True)
+                    return
+
+            error = None
+            if (e := crawl.exception()) is not None:
+                logger.error(f"Crawl job {job.id} failed: {e}")
+                error = str(e) or type(e).__name__
+            async with aget_session() as session:
+                await finish_job(session, job.id, self.name, error)
+                await session.commit()
+        except asyncio.CancelledError:
+            crawl.cancel()
+            await asyncio.gather(crawl, return_exceptions=True)
+            async with aget_session() as session:
+                await release_job(session, job.id, self.name)
+                await session.commit()
+            raise
+        finally:
+            self._slots.release()
+
+    async def _loop(self):
+        while not self.is_stopped:
+            await self._slots.acquire()
+            if self.is_stopped:
+                self._slots.release()
+                break
+            try:
+                # Measured before claiming, so the lease is never overestimated
+                leased_at = asyncio.get_running_loop().time()
+                job = await self._claim()
+            except Exception as e:
+                logger.error(f"Failed to claim a crawl job: {e}")
+                job = None
+            if job is None:
+                self._slots.release()
+                await self.sleep(self.poll_interval)
+                continue
+
+            task = asyncio.create_task(self._run_job(job, leased_at))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _drain(self):
+        # Graceful stop lets the running jobs finish
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _cancel(self):
+        # Interrupted jobs go back to the queue
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,39 @@
+import os
+
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+# Port of the crawler's Prometheus endpoint, 0 disables it
+CRAWLER_METRICS_PORT = int(os.getenv("CRAWLER_METRICS_PORT", "9100"))
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+stage_seconds = Histogram(
+    "snatchy_crawl_stage_seconds",
+    "Time spent in a crawl stage, per page or per written batch",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+pages_fetched = Counter("snatchy_crawl_pages", "Fetched pages", ["engine"])
+bytes_fetched = Counter("snatchy_crawl_bytes_fetched", "Bytes transferred by fetches")
+records_written = Counter("snatchy_crawl_records", "Records passed to the database")
+errors = Counter("snatchy_crawl_errors", "Failed pages and batches", ["stage"])
+crawl_seconds = Histogram(
+    "snatchy_crawl_duration_seconds",
+    "Wall time of whole crawls",
+    ["site"],
+    buckets=(10, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200),
+)
+records_per_second = Gauge(
+    "snatchy_crawl_records_per_second", "Throughput of the last crawl", ["site"]
+)
+
+
+def observe_crawl(site: str, duration: float, records: int):
+    crawl_seconds.labels(site).observe(duration)
+    records_per_second.labels(site).set(records / duration if duration > 0 else 0)
+
+
+def start_metrics_server(port: int = CRAWLER_METRICS_PORT):
+    """Serve /metrics from a background thread, as the crawler has no web app."""
+    if port:
+        start_http_server(port)
@@ -0,0 +1,198 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable
+import asyncio
+import logging
+import os
+import time
+
+from app.domain.crawler.engines import FetchResult
+from app.service import metrics
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()  # End of stream marker passed between the stages
+
+
+@dataclass(frozen=True)
+class PipelineSettings:
+    page_queue_size: int = int(os.getenv("PIPELINE_PAGE_QUEUE_SIZE", "4"))
+    parse_workers: int = int(os.getenv("PIPELINE_PARSE_WORKERS", "2"))
+    record_queue_size: int = int(os.getenv("PIPELINE_RECORD_QUEUE_SIZE", "2000"))
+    batch_size: int = int(os.getenv("PIPELINE_BATCH_SIZE", "500"))
+    flush_interval: timedelta = timedelta(
+        seconds=float(os.getenv("PIPELINE_FLUSH_INTERVAL", "5"))
+    )
+
+
+@dataclass
+class PipelineStats:
+    pages: int = 0
+    records: int = 0
+    batches: int = 0
+    errors: int = 0
+    bytes_fetched: int = 0
+    skipped: int = 0  # Pages not parsed as they did not change
+    failed_urls: list[str] = field(default_factory=list)
+    results: list[Any] = field(default_factory=list)  # Returned by each write
+    # Total seconds per stage, e.g. navigation, content, parse and write
+    timings: dict[str, float] = field(default_factory=lambda: defaultdict(float))
+    # Seconds of every call per stage, i.e. per page, or per batch for writes
+    samples: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+
+    def add_timing(self, stage: str, seconds: float):
+        self.timings[stage] += seconds
+        self.samples[stage].append(seconds)
+        metrics.stage_seconds.labels(stage).observe(seconds)
+
+    def add_error(self, stage: str):
+        self.errors += 1
+        metrics.errors.labels(stage).inc()
+
+
+def normalize_item(item: dict[str, Any]) -> dict[str, Any] | None:
+    """Clean up a parsed item, None drops it."""
+    if not (title := (item.get("title") or "").strip()):
+        return None  # Title is required by the schema
+    return {**item, "title": title}
+
+
+class CrawlPipeline:
+    """Streams pages through fetch -> parse -> normalize -> batch write.
+
+    Stages are connected by bounded queues, so a slow stage holds back the
+    ones before it and memory stays bounded no matter how many pages a crawl
+    has. Every batch is written on its own, so results survive a failure later
+    in the crawl.
+    """
+
+    def __init__(
+        self,
+        pages: AsyncIterator[FetchResult],
+        parse: Callable[[str], Awaitable[list[dict[str, Any]]]],
+        write: Callable[[list[dict[str, Any]]], Awaitable[Any]],
+        normalize: Callable[[dict[str, Any]], dict[str, Any] | None] = normalize_item,
+        settings: PipelineSettings | None = None,
+        archive: Callable[[FetchResult], Awaitable[Any]] | None = None,
+        unchanged: Callable[[FetchResult], Awaitable[bool]] | None = None,
+        parsed: Callable[[FetchResult, list[dict[str, Any]]], Any] | None = None,
+    ):
+        self.pages = pages
+        self.parse = parse
+        self.write = write
+        self.archive = archive  # e.g. stores a snapshot of each page
+        self.unchanged = unchanged  # Pages it is true for are not parsed
+        self.parsed = parsed  # Called with the items of every parsed page
+        self.normalize = normalize
+        self.settings = settings or PipelineSettings()
+        self.stats = PipelineStats()
+
+    async def _fetch_stage(self, page_queue: asyncio.Queue):
+        try:
+            async for page in self.pages:
+                self.stats.pages += 1
+                self.stats.bytes_fetched += page.bytes_received
+                for stage, seconds in page.timings.items():
+                    self.stats.add_timing(stage, seconds)
+                metrics.pages_fetched.labels(page.engine).inc()
+                metrics.bytes_fetched.inc(page.bytes_received)
+                await page_queue.put(page)
+        except Exception as e:
+            # Keep what was fetched so far, the rest of the crawl is lost
+            self.stats.add_error("fetch")
+            logger.error(f"Fetching stopped early: {e}")
+        finally:
+            # Stops the fetches still running, also when the crawl is cancelled
+            if (aclose := getattr(self.pages, "aclose", None)) is not None:
+                await aclose()
+        for _ in range(self.settings.parse_workers):
+            await page_queue.put(_DONE)
+
+    async def _parse_stage(
+        self, page_queue: asyncio.Queue, record_queue: asyncio.Queue
+    ):
+        while (page := await page_queue.get()) is not _DONE:
+            if self.archive is not None and not page.not_modified:
+                await self._archive(page)
+            if (
+                self.unchanged is not None and await self.unchanged(page)
+            ) or page.not_modified:
+                self.stats.skipped += 1
+                continue
+            start = time.perf_counter()
+            try:
+                items = await self.parse(page.html)
+            except Exception as e:
+                self.stats.add_error("parse")
+                self.stats.failed_urls.append(page.url)
+                logger.error(f"Failed to parse {page.url}: {e}")
+                continue
+            self.stats.add_timing("parse", time.perf_counter() - start)
+            if self.parsed is not None:
+                self.parsed(page, items)
+            for item in items:
+                if (item := self.normalize(item)) is not None:
+                    await record_queue.put(item)
+        await record_queue.put(_DONE)
+
+    async def _archive(self, page: FetchResult):
+        start = time.perf_counter()
+        try:
+            await self.archive(page)
+        except Exception as e:
+            # A missing snapshot must not cost the records
+            self.stats.add_error("archive")
+            logger.error(f"Failed to archive {page.url}: {e}")
+            return
+        self.stats.add_timing("archive", time.perf_counter() - start)
+
+    async def _flush(self, batch: list[dict[str, Any]]):
+        if batch:
+            start = time.perf_counter()
+            try:
+                self.stats.results.append(await self.write(batch))
+            except Exception:
+                self.stats.add_error("write")
+                raise
+            self.stats.add_timing("write", time.perf_counter() - start)
+            self.stats.records += len(batch)
+            self.stats.batches += 1
+            metrics.records_written.inc(len(batch))
+
+    async def _write_stage(self, record_queue: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        batch, flush_at = [], None
+        running_parsers = self.settings.parse_workers
+
+        while running_parsers:
+            timeout = None if flush_at is None else max(flush_at - loop.time(), 0)
+            try:
+                item = await asyncio.wait_for(record_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                item = None  # Flush interval elapsed
+
+            if item is _DONE:
+                running_parsers -= 1
+            elif item is not None:
+                if not batch:
+                    flush_at = (
+                        loop.time() + self.settings.flush_interval.total_seconds()
+                    )
+                batch.append(item)
+
+            if item is None or len(batch) >= self.settings.batch_size:
+                await self._flush(batch)
+                batch, flush_at = [], None
+        await self._flush(batch)
+
+    async def run(self) -> PipelineStats:
+        page_queue = asyncio.Queue(maxsize=self.settings.page_queue_size)
+        record_queue = asyncio.Queue(maxsize=self.settings.record_queue_size)
+
+        async with asyncio.TaskGroup() as group:
+            group.create_task(self._fetch_stage(page_queue))
+            for _ in range(self.settings.parse_workers):
+                group.create_task(self._parse_stage(page_queue, record_queue))
+            group.create_task(self._write_stage(record_queue))
+        return self.stats
@@ -0,0 +1,114 @@
+from collections import defaultdict
+from dataclasses import replace
+from datetime import timedelta
+from urllib.parse import urlparse
+import asyncio
+
+from sqlalchemy import Table, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.domain.crawler.throttling import RatePolicy
+from app.model.models.models import Domain, DomainRegulation, Site
+from app.model.session import aget_session
+
+
+class SiteRegistry:
+    """In-memory map of domain and site URLs to their row ids.
+
+    All known rows are loaded on first use, so resolving a crawl's site is a
+    dictionary lookup. Misses are inserted with ON CONFLICT DO NOTHING, which
+    makes concurrent crawls (even in other processes) safe against the unique
+    constraints.
+    """
+
+    def __init__(self):
+        self._domains: dict[str, int] = {}
+        self._sites: dict[str, int] = {}
+        self._warmed = False
+        self._locks = defaultdict(asyncio.Lock)
+
+    async def warm(self):
+        async with aget_session() as session:
+            self._domains.update(
+                (await session.execute(select(Domain.url, Domain.id))).tuples().all()
+            )
+            self._sites.update(
+                (await session.execute(select(Site.url, Site.id))).tuples().all()
+            )
+        self._warmed = True
+
+    @staticmethod
+    async def _get_or_create(session, table: Table, values: dict) -> int:
+        url = values["url"]
+        stmt = (
+            pg_insert(table)
+            .values(**values)
+            .on_conflict_do_nothing(index_elements=[table.c.url])
+            .returning(table.c.id)
+        )
+        if (row_id := (await session.execute(stmt)).scalar_one_or_none()) is None:
+            # Somebody else inserted it first
+            stmt = select(table.c.id).where(table.c.url == url)
+            row_id = (await session.execute(stmt)).scalar_one()
+        return row_id
+
+    async def get_site_id(self, url: str) -> int:
+        """Id of the Site (scheme + host) of a crawled URL, created if needed."""
+        parsed_url = urlparse(url)
+        domain_name = parsed_url.netloc
+        site_url = f"{parsed_url.scheme}://{domain_name}"
+
+        if (site_id := self._sites.get(site_url)) is not None:
+            return site_id
+
+        async with self._locks[site_url]:
+            if not self._warmed:
+                await self.warm()
+            if (site_id := self._sites.get(site_url)) is not None:
+                return site_id
+
+            async with aget_session() as session:
+                if (domain_id := self._domains.get(domain_name)) is None:
+                    domain_id = await self._get_or_create(
+                        session, Domain.__table__, {"url": domain_name}
+                    )
+                site_id = await self._get_or_create(
+                    session, Site.__table__, {"url": site_url, "domain_id": domain_id}
+                )
+                await session.commit()
+
+            self._domains[domain_name] = domain_id
+            self._sites[site_url] = site_id
+            return site_id
+
+
+async def load_rate_policy(url: str, default: RatePolicy) -> RatePolicy | None:
+    """Rate policy of the URL's domain, None if crawling it is not allowed.
+
+    Limits missing in the domain's regulation are taken from `default`.
+    """
+    async with aget_session() as session:
+        stmt = (
+            select(DomainRegulation)
+            .join(Domain)
+            .where(Domain.url == urlparse(url).netloc)
+            .order_by(DomainRegulation.id.desc())
+            .limit(1)
+        )
+        regulation = (await session.execute(stmt)).scalar_one_or_none()
+
+    if regulation is None:
+        return default
+    if not regulation.is_allowed:
+        return None
+    limits = {}
+    if regulation.max_requests_per_second is not None:
+        limits["max_rps"] = regulation.max_requests_per_second
+    if regulation.max_concurrency is not None:
+        limits["max_concurrency"] = regulation.max_concurrency
+    if regulation.backoff_seconds is not None:
+        limits["backoff"] = timedelta(seconds=regulation.backoff_seconds)
+    return replace(default, **limits)
+
+
+site_registry = SiteRegistry()
@@ -0,0 +1,80 @@
+from hashlib import sha256
+from typing import AsyncIterator
+import os
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+import zstandard
+
+from app.domain.crawler.engines import FetchResult
+from app.model.models.models import CrawlPage, Snapshot
+
+SNAPSHOT_ZSTD_LEVEL = int(os.getenv("SNAPSHOT_ZSTD_LEVEL", "3"))
+REPLAY_BATCH_SIZE = 50
+
+snapshots_table = Snapshot.__table__
+crawl_pages_table = CrawlPage.__table__
+
+# Used from the event loop thread only, compressors are not thread safe
+_compressor = zstandard.ZstdCompressor(level=SNAPSHOT_ZSTD_LEVEL)
+_decompressor = zstandard.ZstdDecompressor()
+
+
+def content_hash(raw: bytes) -> str:
+    return sha256(raw).hexdigest()
+
+
+def compress(raw: bytes) -> bytes:
+    return _compressor.compress(raw)
+
+
+def decompress(data: bytes) -> str:
+    return _decompressor.decompress(data).decode()
+
+
+async def store_snapshot(session: AsyncSession, crawl_id: int, page: FetchResult):
+    """Store the page HTML, once per distinct content, and link it to the crawl."""
+    raw = page.html.encode()
+    digest = content_hash(raw)
+
+    find = select(snapshots_table.c.id).where(snapshots_table.c.content_hash == digest)
+    if (snapshot_id := (await session.execute(find)).scalar_one_or_none()) is None:
+        stmt = (
+            pg_insert(snapshots_table)
+            .values(content_hash=digest, size=len(raw), data=compress(raw))
+            .on_conflict_do_nothing(index_elements=[snapshots_table.c.content_hash])
+            .returning(snapshots_table.c.id)
+        )
+        snapshot_id = (await session.execute(stmt)).scalar_one_or_none()
+        if snapshot_id is None:
+            # Stored by a concurrent crawl in the meantime
+            snapshot_id = (await session.execute(find)).scalar_one()
+
+    await session.execute(
+        crawl_pages_table.insert().values(
+            crawl_id=crawl_id, snapshot_id=snapshot_id, url=page.url, status=page.status
+        )
+    )
+
+
+async def iter_snapshots(
+    session: AsyncSession, crawl_id: int
+) -> AsyncIterator[FetchResult]:
+    """Pages of a crawl as they were fetched, read from the snapshots."""
+    stmt = (
+        select(CrawlPage.url, CrawlPage.status, Snapshot.data)
+        .join(Snapshot, CrawlPage.snapshot_id == Snapshot.id)
+        .where(CrawlPage.crawl_id == crawl_id)
+        .order_by(CrawlPage.id)
+        .execution_options(yield_per=REPLAY_BATCH_SIZE)
+    )
+    result = await session.stream(stmt)
+    async for url, status, data in result:
+        yield FetchResult(
+            url=url,
+            html=decompress(data),
+            status=status,
+            bytes_received=len(data),
+            engine="snapshot",
+        )
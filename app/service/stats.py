@@ -0,0 +1,86 @@
+from datetime import timedelta
+import asyncio
+import logging
+import os
+
+from sqlalchemy import text
+
+from app.model.models.views import MATERIALIZED_VIEWS
+from app.model.session import aget_session
+
+logger = logging.getLogger(__name__)
+
+# Crawls finishing within this interval share one refresh of the statistics
+STATS_REFRESH_INTERVAL = timedelta(
+    seconds=float(os.getenv("STATS_REFRESH_INTERVAL", "300"))
+)
+
+# Only one crawler process refreshes at a time
+_LOCK_ID = 7_340_033
+
+
+async def refresh_price_stats() -> bool:
+    """Recompute the price statistics views, False if another process is at it.
+
+    Views are refreshed concurrently, the API keeps reading the old contents
+    until the new ones are ready.
+    """
+    async with aget_session() as session:
+        stmt = text(f"SELECT pg_try_advisory_xact_lock({_LOCK_ID})")
+        if not (await session.execute(stmt)).scalar():
+            return False
+        for view in MATERIALIZED_VIEWS:
+            await session.execute(
+                text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view.name}")
+            )
+        await session.commit()
+    return True
+
+
+class StatsRefresher:
+    """Debounces refreshes of the price statistics after crawls.
+
+    A request made within `interval` of the last refresh is postponed until
+    the interval passes, and any number of requests made meanwhile result in
+    a single refresh. A request made while a refresh runs, or a refresh left
+    to another process, is followed by one more refresh, as the running one
+    may have started before the crawl committed its records.
+    """
+
+    def __init__(self, interval: timedelta = STATS_REFRESH_INTERVAL):
+        self.interval = interval
+        self._last_refresh: float | None = None
+        self._pending = False
+        self._task: asyncio.Task | None = None
+
+    def request(self):
+        self._pending = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh())
+
+    async def _refresh(self):
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            if self._last_refresh is not None:
+                wait = self._last_refresh + self.interval.total_seconds()
+                await asyncio.sleep(max(wait - loop.time(), 0))
+            self._pending = False
+            start = loop.time()
+            self._last_refresh = start
+            try:
+                refreshed = await refresh_price_stats()
+            except Exception as e:
+                logger.error(f"Failed to refresh price statistics: {e}")
+                refreshed = False
+            if refreshed:
+                logger.info(f"Refreshed price statistics in {loop.time() - start:.1f}s")
+            else:
+                self._pending = True  # Retried after the interval
+
+    async def shutdown(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+stats_refresher = StatsRefresher()
@@ -0,0 +1,64 @@
+from typing import Any, Awaitable, Callable
+import asyncio
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def database_settings() -> None:
+    """Skips tests importing app.model.session, which needs POSTGRES_* set.
+
+    Import such modules in the tests, never at the top of a test module, or
+    collecting it fails without the settings.
+    """
+    for name in ("POSTGRES_HOST", "POSTGRES_PORT"):
+        if not os.getenv(name):
+            pytest.skip(f"{name} is not set")
+
+
+@pytest.fixture(scope="session")
+def database(database_settings) -> None:
+    """Skips tests which need Postgres, when it is not configured or reachable."""
+    from sqlalchemy import text
+
+    from app.model.session import aget_session
+
+    async def ping():
+        async with aget_session() as session:
+            await session.execute(text("SELECT 1"))
+
+    try:
+        run_async(ping)
+    except Exception as e:
+        pytest.skip(f"Database is not reachable: {e}")
+
+
+@pytest.fixture
+def api(database):
+    """api_server.main, which connects on import, see database_settings."""
+    from api_server import main
+
+    return main
+
+
+def run_async(function: Callable[[], Awaitable[Any]]) -> Any:
+    """Run a coroutine on a new loop, with a fresh connection pool.
+
+    Pooled asyncpg connections belong to the loop which opened them.
+    """
+    from app.model.session import engine
+
+    async def main():
+        try:
+            return await function()
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def run(database) -> Callable[[Callable[[], Awaitable[Any]]], Any]:
+    """Runs a database test body, see run_async."""
+    return run_async
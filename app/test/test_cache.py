@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta
+import asyncio
+
+import pytest
+
+from api_server import cache
+from api_server.cache import MISSING, CrawlGeneration, LRUTTLCache
+from app.model.models.models import Crawl, Domain, Site
+
+
+class FakeTime:
+    """Stands in for the time module of api_server.cache."""
+
+    now = 1000.0
+
+    @classmethod
+    def monotonic(cls) -> float:
+        return cls.now
+
+
+class FakeSession:
+    """Answers the generation query with the finished crawls set on it."""
+
+    def __init__(self):
+        self.finished: list[datetime] = []
+        self.queries = 0
+
+    async def execute(self, stmt):
+        self.queries += 1
+        return self
+
+    def one(self):
+        return len(self.finished), max(self.finished, default=None)
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    FakeTime.now = 1000.0
+    monkeypatch.setattr(cache, "time", FakeTime)
+    return FakeTime
+
+
+def test_least_recently_used_entry_is_evicted():
+    lru = LRUTTLCache(maxsize=2, ttl=timedelta(minutes=1))
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1  # b is now the least recently used
+    lru.set("c", 3)
+
+    assert lru.get("b") is MISSING
+    assert (lru.get("a"), lru.get("c")) == (1, 3)
+    assert lru.stats()["evictions"] == 1
+
+
+def test_setting_an_entry_again_refreshes_it():
+    lru = LRUTTLCache(maxsize=2, ttl=timedelta(minutes=1))
+    lru.set("a", 1)
+    lru.set("b", 2)
+    lru.set("a", 10)
+    lru.set("c", 3)
+    assert (lru.get("a"), lru.get("b")) == (10, MISSING)
+
+
+def test_entries_expire_after_the_ttl(clock):
+    lru = LRUTTLCache(maxsize=10, ttl=timedelta(seconds=30))
+    lru.set("a", 1)
+    clock.now += 30
+    assert lru.get("a") == 1
+    clock.now += 0.001
+    assert lru.get("a") is MISSING
+    assert lru.stats() | {"hit_ratio": None} == {
+        "size": 0,
+        "maxsize": 10,
+        "hits": 1,
+        "misses": 1,
+        "evictions": 0,
+        "hit_ratio": None,
+    }
+
+
+def test_size_must_be_positive():
+    with pytest.raises(ValueError):
+        LRUTTLCache(maxsize=0, ttl=timedelta(minutes=1))
+
+
+def test_generation_changes_when_a_crawl_finishes(clock):
+    session = FakeSession()
+    generation = CrawlGeneration(check_interval=timedelta(seconds=30))
+
+    async def main():
+        assert await generation.refresh(session)  # First look
+        assert not await generation.refresh(session)  # Checked just now
+
+        session.finished.append(datetime(2026, 10, 18, 12))
+        assert not await generation.refresh(session)  # Not due yet
+        clock.now += 30
+        assert await generation.refresh(session)
+        clock.now += 30
+        assert not await generation.refresh(session)  # Nothing new
+
+    asyncio.run(main())
+    assert session.queries == 3
+    assert generation.value == (1, datetime(2026, 10, 18, 12))
+
+
+def test_concurrent_requests_check_the_generation_once():
+    session = FakeSession()
+    generation = CrawlGeneration(check_interval=timedelta(seconds=30))
+
+    async def main():
+        return await asyncio.gather(*(generation.refresh(session) for _ in range(5)))
+
+    assert asyncio.run(main()).count(True) == 1
+    assert session.queries == 1
+
+
+def test_finished_crawl_drops_cached_pages(run, api, clock, monkeypatch):
+    from app.model.session import aget_session
+
+    monkeypatch.setattr(api, "query_cache", LRUTTLCache(10, timedelta(hours=1)))
+    generation = CrawlGeneration(check_interval=timedelta(seconds=30))
+    monkeypatch.setattr(api, "crawl_generation", generation)
+    query = api.PagedQuery(title="cache-test")
+
+    async def main():
+        async with aget_session() as session:
+            first = await api.query_records(query, session)
+            assert await api.query_records(query, session) is first
+
+            # Seen by the generation query of this session, rolled back after
+            site = Site(url="https://cache.test", domain=Domain(url="cache.test"))
+            session.add(Crawl(site=site, finished_at=datetime(2026, 10, 18)))
+            await session.flush()
+            assert await api.query_records(query, session) is first  # Not due
+            clock.now += 30
+            assert await api.query_records(query, session) is not first
+            await session.rollback()
+
+    run(main)
@@ -0,0 +1,86 @@
+from functools import partial
+import asyncio
+
+from app.domain.crawler.engines import FetchResult, Validators
+from app.domain.crawler.executors import ParseExecutor
+from app.domain.crawler.parsers import BezRealitkyParser
+from app.service.fingerprints import ChangeDetector, PageState
+from benchmarks.fixtures import results_page
+
+URL = "https://www.bezrealitky.cz/vyhledat?page=1"
+
+
+def detect(detector: ChangeDetector, page: FetchResult) -> bool:
+    return asyncio.run(detector.is_unchanged(page))
+
+
+def fingerprint(html: str) -> str:
+    executor = ParseExecutor("inline")
+    return asyncio.run(executor.fingerprint(BezRealitkyParser, html))
+
+
+def new_detector(previous: dict[str, PageState]) -> ChangeDetector:
+    executor = ParseExecutor("inline")
+    return ChangeDetector(previous, partial(executor.fingerprint, BezRealitkyParser))
+
+
+def test_new_page_is_parsed_and_remembers_its_listings():
+    html = results_page(cards=3)
+    detector = new_detector({})
+    page = FetchResult(URL, html, status=200, validators=Validators(etag='"v1"'))
+
+    assert not detect(detector, page)
+    detector.parsed(page, BezRealitkyParser.parse(html))
+
+    state = detector.processed()[URL]
+    assert state.fingerprint == fingerprint(html)
+    assert state.etag == '"v1"'
+    assert state.external_ids == ("901000", "901001", "901002")
+    assert detector.unchanged_ids == set()
+
+
+def test_unchanged_page_keeps_its_listings_as_seen():
+    html = results_page(cards=3)
+    previous = PageState(fingerprint(html), external_ids=("901000", "901001"))
+    detector = new_detector({URL: previous})
+
+    # Scripts change on every request, the listings do not
+    page = FetchResult(URL, html.replace("Byty na prodej", "Byty"), status=200)
+    assert detect(detector, page)
+    assert detector.unchanged_ids == {"901000", "901001"}
+    assert detector.processed()[URL].external_ids == ("901000", "901001")
+
+
+def test_not_modified_page_keeps_its_listings_as_seen():
+    previous = PageState("0" * 64, etag='"v1"', external_ids=("901000",))
+    detector = new_detector({URL: previous})
+
+    assert detect(detector, FetchResult(URL, "", status=304))
+    assert detector.unchanged_ids == {"901000"}
+    assert URL not in detector.processed()  # The stored state stays as it is
+
+
+def test_changed_page_is_parsed():
+    previous = PageState(fingerprint(results_page(seed=1)), external_ids=("1",))
+    detector = new_detector({URL: previous})
+
+    assert not detect(detector, FetchResult(URL, results_page(seed=2), status=200))
+    assert detector.unchanged_ids == set()
+
+
+def test_failed_pages_are_not_stored():
+    detector = new_detector({})
+    detect(detector, FetchResult(URL, results_page(), status=200))
+    assert detector.processed(failed=[URL]) == {}
+
+
+def test_is_complete_reads_the_embedded_state():
+    with_cards = results_page(cards=2, with_next_data=False)
+    # Only the embedded state, as rendered with any JSON separators
+    state_only = results_page(cards=2).replace("PropertyCard_", "Card_")
+    no_adverts = state_only.replace('"Advert"', '"Banner"')
+
+    assert BezRealitkyParser.is_complete(with_cards)
+    assert BezRealitkyParser.is_complete(state_only)
+    assert not BezRealitkyParser.is_complete(no_adverts)
+    assert not BezRealitkyParser.is_complete("<html><body>captcha</body></html>")
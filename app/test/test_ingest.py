@@ -0,0 +1,84 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import delete, select
+
+from app.model.models.models import (
+    Crawl,
+    Description,
+    Domain,
+    Listing,
+    RealEstateRecord,
+    Record,
+    Site,
+)
+
+LISTINGS = 2000
+
+
+@pytest.fixture
+def crawl_ids(run):
+    """A crawl of a throwaway site, as (site_id, crawl_id)."""
+    from app.model.session import aget_session
+
+    host = f"{uuid.uuid4()}.ingest.test"
+
+    async def create():
+        async with aget_session() as session:
+            site = Site(url=f"https://{host}", domain=Domain(url=host))
+            crawl = Crawl(site=site)
+            session.add(crawl)
+            await session.commit()
+            return site.id, crawl.id
+
+    site_id, crawl_id = run(create)
+    yield site_id, crawl_id
+
+    async def cleanup():
+        async with aget_session() as session:
+            records = select(Record.id).where(Record.crawl_id == crawl_id)
+            for model, column in (
+                (Description, Description.record_id),
+                (RealEstateRecord, RealEstateRecord.id),
+                (Record, Record.id),
+            ):
+                await session.execute(delete(model).where(column.in_(records)))
+            await session.execute(delete(Listing).where(Listing.site_id == site_id))
+            await session.execute(delete(Crawl).where(Crawl.id == crawl_id))
+            await session.execute(delete(Site).where(Site.id == site_id))
+            await session.execute(delete(Domain).where(Domain.url == host))
+            await session.commit()
+
+    run(cleanup)
+
+
+def items(external_ids) -> list[dict]:
+    return [
+        {"title": f"Byt {i}", "price": 5_000_000, "currency": "CZK", "description": i}
+        for i in external_ids
+    ]
+
+
+def test_overlapping_batches_do_not_deadlock(run, crawl_ids):
+    from app.model.session import aget_session
+    from app.service.ingest import touch_listings, upsert_real_estate_records
+
+    site_id, crawl_id = crawl_ids
+    external_ids = [f"{i:05}" for i in range(LISTINGS)]
+
+    async def upsert(batch):
+        async with aget_session() as session:
+            await upsert_real_estate_records(session, site_id, crawl_id, items(batch))
+            await touch_listings(session, site_id, reversed(batch))
+            await asyncio.sleep(0.1)  # Hold the locks while the other one runs
+            await session.commit()
+
+    async def main():
+        await upsert(external_ids[:10])  # The listings exist, updates lock them
+        await asyncio.gather(upsert(external_ids), upsert(external_ids[::-1]))
+        async with aget_session() as session:
+            stmt = select(Listing.external_id).where(Listing.site_id == site_id)
+            return set((await session.execute(stmt)).scalars())
+
+    assert run(main) == set(external_ids)
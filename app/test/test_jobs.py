@@ -0,0 +1,274 @@
+from datetime import timedelta
+import asyncio
+import os
+import signal
+import uuid
+
+import pytest
+from sqlalchemy import delete, select
+
+from app.model.models.models import CrawlJob
+
+# Before any job a database used for development may hold
+PRIORITY = -(10**9)
+EXPIRED = timedelta(seconds=-1)
+
+
+@pytest.fixture
+def jobs(database_settings):
+    """app.service.jobs, which connects on import, see database_settings."""
+    from app.service import jobs
+
+    return jobs
+
+
+def aget_session():
+    from app.model.session import aget_session
+
+    return aget_session()
+
+
+@pytest.fixture
+def url(run):
+    url = f"https://jobs.test/{uuid.uuid4()}"
+    yield url
+
+    async def cleanup():
+        async with aget_session() as session:
+            await session.execute(delete(CrawlJob).where(CrawlJob.url == url))
+            await session.commit()
+
+    run(cleanup)
+
+
+async def enqueue(jobs, url: str) -> bool:
+    async with aget_session() as session:
+        queued = await jobs.enqueue_job(session, url, priority=PRIORITY)
+        await session.commit()
+    return queued
+
+
+async def get_job(session, url: str) -> CrawlJob:
+    stmt = (
+        select(CrawlJob)
+        .where(CrawlJob.url == url)
+        .execution_options(populate_existing=True)
+    )
+    return (await session.execute(stmt)).scalar_one()
+
+
+def test_enqueue_skips_pending_urls(run, url, jobs):
+    async def main():
+        assert await enqueue(jobs, url)
+        assert not await enqueue(jobs, url)
+
+    run(main)
+
+
+def test_claim_skips_jobs_locked_by_another_worker(run, url, jobs):
+    async def main():
+        await enqueue(jobs, url)
+        async with aget_session() as first, aget_session() as second:
+            job = await jobs.claim_job(first, "a")
+            assert job.url == url
+            assert (
+                job.status == jobs.RUNNING and job.worker == "a" and job.attempts == 1
+            )
+            assert job.lease_expires_at > job.started_at
+
+            other = await jobs.claim_job(second, "b")
+            assert other is None or other.url != url
+            await second.rollback()
+            await first.rollback()
+
+    run(main)
+
+
+def test_lease_is_renewed_only_by_its_worker(run, url, jobs):
+    async def main():
+        await enqueue(jobs, url)
+        async with aget_session() as session:
+            job = await jobs.claim_job(session, "a", timedelta(seconds=30))
+            claimed_until = job.lease_expires_at
+            assert await jobs.renew_lease(session, job.id, "a", timedelta(hours=1))
+            assert not await jobs.renew_lease(session, job.id, "b")
+            renewed = await get_job(session, url)
+            assert renewed.lease_expires_at - claimed_until > timedelta(minutes=30)
+            await session.rollback()
+
+    run(main)
+
+
+def test_expired_lease_is_taken_over_until_attempts_run_out(run, url, jobs):
+    async def main():
+        await enqueue(jobs, url)
+        async with aget_session() as session:
+            for attempt in range(1, jobs.CRAWL_JOB_MAX_ATTEMPTS + 1):
+                job = await jobs.claim_job(session, f"worker-{attempt}", EXPIRED)
+                assert (job.url, job.worker, job.attempts) == (
+                    url,
+                    f"worker-{attempt}",
+                    attempt,
+                )
+
+            claimed = await jobs.claim_job(session, "late")
+            assert claimed is None or claimed.url != url
+            job = await get_job(session, url)
+            assert (job.status, job.error) == (jobs.FAILED, "Lease expired")
+            await session.rollback()
+
+    run(main)
+
+
+def test_failed_job_is_retried_after_a_delay(run, url, jobs):
+    async def main():
+        await enqueue(jobs, url)
+        async with aget_session() as session:
+            job = await jobs.claim_job(session, "a")
+            await jobs.finish_job(session, job.id, "a", error="Timeout")
+            retried = await get_job(session, url)
+            assert (retried.status, retried.worker, retried.error) == (
+                jobs.QUEUED,
+                None,
+                "Timeout",
+            )
+            assert retried.run_after > job.started_at
+            # Not due yet
+            claimed = await jobs.claim_job(session, "b")
+            assert claimed is None or claimed.url != url
+            await session.rollback()
+
+    run(main)
+
+
+def test_job_fails_for_good_after_the_last_attempt(run, url, jobs):
+    async def main():
+        await enqueue(jobs, url)
+        async with aget_session() as session:
+            for attempt in range(1, jobs.CRAWL_JOB_MAX_ATTEMPTS):
+                await jobs.claim_job(session, "a", EXPIRED)
+            job = await jobs.claim_job(session, "a")
+            assert job.attempts == jobs.CRAWL_JOB_MAX_ATTEMPTS
+            await jobs.finish_job(session, job.id, "a", error="Timeout")
+            assert (await get_job(session, url)).status == jobs.FAILED
+            await session.rollback()
+
+    run(main)
+
+
+def test_finished_job_is_done(run, url, jobs):
+    async def main():
+        await enqueue(jobs, url)
+        async with aget_session() as session:
+            job = await jobs.claim_job(session, "a")
+            await jobs.finish_job(session, job.id, "a")
+            await session.commit()
+            done = await get_job(session, url)
+            assert done.status == jobs.DONE and done.finished_at is not None
+
+        # A finished job does not block queueing the URL again
+        assert await enqueue(jobs, url)
+
+    run(main)
+
+
+def test_released_job_keeps_its_attempt(run, url, jobs):
+    async def main():
+        await enqueue(jobs, url)
+        async with aget_session() as session:
+            job = await jobs.claim_job(session, "a")
+            await jobs.release_job(session, job.id, "b")  # Not the owner
+            assert (await get_job(session, url)).status == jobs.RUNNING
+
+            await jobs.release_job(session, job.id, "a")
+            released = await get_job(session, url)
+            assert (released.status, released.attempts) == (jobs.QUEUED, 0)
+            again = await jobs.claim_job(session, "b")
+            assert (again.url, again.attempts) == (url, 1)
+            await session.rollback()
+
+    run(main)
+
+
+def test_crawl_is_cancelled_once_the_lease_cannot_be_renewed(jobs):
+    cancelled = asyncio.Event()
+
+    async def crawl(url: str):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def main():
+        worker = jobs.CrawlWorker(crawl, lease=timedelta(seconds=0.3))
+        renewals = 0
+
+        async def unreachable(job):
+            nonlocal renewals
+            renewals += 1
+            return None
+
+        worker._renew = unreachable
+        await worker._slots.acquire()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        job = CrawlJob(id=1, url="https://jobs.test/")
+        await asyncio.wait_for(worker._run_job(job, start), 2)
+        assert cancelled.is_set()
+        assert renewals == 3  # Kept crawling until the lease ran out
+        assert 0.3 <= loop.time() - start < 0.6
+
+    asyncio.run(main())
+
+
+def test_sigterm_stops_the_worker(jobs):
+    stopped = []
+
+    async def crawl(url: str):
+        pass
+
+    async def on_stop():
+        stopped.append(True)
+
+    async def main():
+        worker = jobs.CrawlWorker(
+            crawl, poll_interval=timedelta(seconds=10), on_stop=[on_stop]
+        )
+
+        async def no_jobs():
+            return None
+
+        worker._claim = no_jobs
+        asyncio.get_running_loop().call_later(0.1, os.kill, os.getpid(), signal.SIGTERM)
+        await asyncio.wait_for(worker._run_loop(), 2)
+        assert worker.is_stopped
+
+    asyncio.run(main())
+    assert stopped
+
+
+def test_failing_start_hook_stops_before_claiming(jobs):
+    claims, stopped = [], []
+
+    async def crawl(url: str):
+        pass
+
+    async def broken():
+        raise ValueError("No such parser")
+
+    async def on_stop():
+        stopped.append(True)
+
+    async def main():
+        worker = jobs.CrawlWorker(crawl, on_start=[broken], on_stop=[on_stop])
+
+        async def claim():
+            claims.append(True)
+
+        worker._claim = claim
+        with pytest.raises(ValueError):
+            await worker._run_loop()
+
+    asyncio.run(main())
+    assert (claims, stopped) == ([], [True])
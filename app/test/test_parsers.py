@@ -0,0 +1,75 @@
+from pathlib import Path
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.domain.crawler.parsers import (
+    Bs4Backend,
+    LxmlBackend,
+    lxml_html,
+    parse_next_data,
+)
+
+FIXTURES = sorted((Path(__file__).parent / "fixtures").glob("*.html"))
+SHARED_FIELDS = ("title", "price", "currency", "description")
+
+needs_lxml = pytest.mark.skipif(lxml_html is None, reason="lxml is not installed")
+
+
+def parse(backend, html: str) -> list[dict]:
+    return [backend.parse_card(card) for card in backend.cards(html)]
+
+
+@needs_lxml
+@pytest.mark.parametrize("path", FIXTURES, ids=lambda path: path.name)
+def test_backends_agree_on_saved_pages(path):
+    html = path.read_text(encoding="utf-8")
+    expected = parse(Bs4Backend, html)
+    assert expected
+    assert parse(LxmlBackend, html) == expected
+
+
+def test_edge_cases_are_parsed():
+    html = (Path(__file__).parent / "fixtures" / "edge_cases.html").read_text()
+    full, on_request, zero_ppm, promoted = parse(Bs4Backend, html)
+
+    assert full["title"] == "Korunní\xa012, Praha\xa0-\xa0Vinohrady"
+    assert (full["price"], full["description"]) == (7_290_000, "912345")
+    assert full["flooring_m_squared"] == pytest.approx(54)
+    assert (on_request["price"], on_request["flooring_m_squared"]) == (None, None)
+    assert (zero_ppm["price"], zero_ppm["flooring_m_squared"]) == (5_100_000, None)
+    assert (promoted["title"], promoted["description"]) == (None, None)
+
+
+def test_embedded_state_matches_the_cards():
+    html = (Path(__file__).parent / "fixtures" / "results_page.html").read_text()
+
+    def comparable(item):
+        shared = tuple(item[field] for field in SHARED_FIELDS)
+        return shared + (round(item["flooring_m_squared"], 1),)
+
+    cards = [comparable(item) for item in parse(Bs4Backend, html)]
+    assert [comparable(item) for item in parse_next_data(html)] == cards
+
+
+@needs_lxml
+@pytest.mark.parametrize("html", ["", "  \n", "<!-- nothing -->"])
+def test_empty_body_has_no_cards(html):
+    assert Bs4Backend.cards(html) == []
+    assert LxmlBackend.cards(html) == []
+
+
+def test_missing_lxml_fails_at_startup():
+    # The import system treats a None module as not installed
+    code = "import sys; sys.modules['lxml'] = None; import app.domain.crawler.parsers"
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        env={**os.environ, "PARSER_BACKEND": "lxml"},
+        cwd=Path(__file__).parents[2],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode != 0
+    assert "PARSER_BACKEND=lxml but lxml is not installed" in result.stderr
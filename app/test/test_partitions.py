@@ -0,0 +1,56 @@
+from datetime import date, datetime
+
+from app.model import partitions
+from app.model.models.models import Crawl, Domain, RealEstateRecord, Site
+from app.model.partitions import (
+    PARTITIONED_TABLES,
+    ensure_partitions,
+    list_partitions,
+    partition_name,
+    retire_partitions,
+)
+
+# Long before any real partition, and DDL is rolled back with the session
+MONTHS = [date(1990, 11, 1), date(1990, 12, 1), date(1991, 1, 1)]
+
+
+def names(*months: date) -> set[str]:
+    return {
+        partition_name(table, month) for month in months for table in PARTITIONED_TABLES
+    }
+
+
+def test_partitions_before_the_cutoff_are_retired(run, database, monkeypatch):
+    from app.model.session import aget_session
+
+    monkeypatch.setattr(partitions, "now", lambda: datetime(1990, 11, 15))
+
+    async def main():
+        async with aget_session() as session:
+            created = await ensure_partitions(session, months_ahead=2)
+            again = await ensure_partitions(session, months_ahead=2)
+
+            site = Site(
+                url="https://retention.test", domain=Domain(url="retention.test")
+            )
+            session.add(
+                RealEstateRecord(
+                    title="Byt 2+kk",
+                    created_at=datetime(1990, 12, 10),
+                    crawl=Crawl(site=site),
+                )
+            )
+            await session.flush()
+
+            retired = await retire_partitions(session, date(1991, 1, 1), drop=True)
+            left = {name for name, _, _ in await list_partitions(session)}
+            await session.rollback()
+        return created, again, retired, left
+
+    created, again, retired, left = run(main)
+    assert set(created) == names(*MONTHS)
+    assert again == []
+    # December still holds the current version of a listing
+    assert set(retired) == names(MONTHS[0])
+    assert names(*MONTHS[1:]) <= left
+    assert not names(MONTHS[0]) & left
@@ -0,0 +1,145 @@
+from datetime import timedelta
+import asyncio
+
+import pytest
+
+from app.domain.crawler.engines import FetchResult
+from app.service.pipeline import CrawlPipeline, PipelineSettings
+
+PAGES = 50
+CARDS = 3
+
+# Every queue holds one entry, so the stages can get at most a few pages ahead
+TIGHT = PipelineSettings(
+    page_queue_size=1,
+    parse_workers=1,
+    record_queue_size=1,
+    batch_size=1,
+    flush_interval=timedelta(seconds=10),
+)
+
+
+class StubEngine:
+    """Yields numbered pages, like Crawler.iter_pages, and counts them."""
+
+    def __init__(self, pages: int = PAGES, fail_at: int | None = None):
+        self.count = pages
+        self.fail_at = fail_at
+        self.fetched = 0
+        self.closed = False
+
+    async def pages(self):
+        try:
+            for number in range(1, self.count + 1):
+                if number == self.fail_at:
+                    raise ConnectionError("Connection reset")
+                self.fetched += 1
+                yield FetchResult(
+                    url=f"https://stub.test/?page={number}", html=str(number)
+                )
+        finally:
+            self.closed = True
+
+
+async def parse(html: str) -> list[dict]:
+    """Stub parser: CARDS items per page, "bad" pages fail."""
+    if html == "bad":
+        raise ValueError("Unexpected markup")
+    return [{"title": f"Byt {html}-{card}"} for card in range(CARDS)]
+
+
+def test_slow_writes_hold_back_fetching():
+    engine = StubEngine()
+    written, fetched_ahead = [], []
+
+    async def write(batch):
+        await asyncio.sleep(0.001)
+        fetched_ahead.append(engine.fetched - (len(written) // CARDS + 1))
+        written.extend(batch)
+
+    stats = asyncio.run(
+        CrawlPipeline(engine.pages(), parse, write, settings=TIGHT).run()
+    )
+
+    assert (stats.pages, stats.records, stats.batches) == (
+        PAGES,
+        PAGES * CARDS,
+        PAGES * CARDS,
+    )
+    # Queued, parsed and in the parser's hands, never the whole crawl
+    assert max(fetched_ahead) <= 3
+
+
+def test_cancelled_run_stops_every_stage_and_fetching():
+    engine = StubEngine()
+    writing = asyncio.Event()
+
+    async def write(batch):
+        writing.set()
+        await asyncio.sleep(10)
+
+    async def main():
+        run = asyncio.create_task(
+            CrawlPipeline(engine.pages(), parse, write, settings=TIGHT).run()
+        )
+        await writing.wait()
+        run.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await run
+        assert asyncio.all_tasks() == {asyncio.current_task()}
+        assert engine.closed  # Before the loop closes leftover generators
+
+    asyncio.run(main())
+    assert engine.fetched < PAGES
+
+
+def test_write_errors_stop_the_crawl():
+    engine = StubEngine()
+
+    async def write(batch):
+        raise RuntimeError("Database is gone")
+
+    async def main():
+        pipeline = CrawlPipeline(engine.pages(), parse, write, settings=TIGHT)
+        with pytest.raises(ExceptionGroup) as error:
+            await pipeline.run()
+        assert engine.closed
+        return pipeline, error
+
+    pipeline, error = asyncio.run(main())
+    assert error.group_contains(RuntimeError, match="Database is gone")
+    assert pipeline.stats.errors == 1
+    assert engine.fetched < PAGES
+
+
+def test_parse_and_fetch_errors_keep_the_other_pages():
+    engine = StubEngine(pages=5, fail_at=5)
+    written = []
+
+    async def flaky_parse(html: str) -> list[dict]:
+        return await parse("bad" if html == "2" else html)
+
+    async def write(batch):
+        written.extend(batch)
+
+    pipeline = CrawlPipeline(engine.pages(), flaky_parse, write)
+    stats = asyncio.run(pipeline.run())
+
+    assert stats.pages == 4  # The fifth failed to fetch
+    assert stats.failed_urls == ["https://stub.test/?page=2"]
+    assert (stats.errors, stats.records) == (2, 3 * CARDS)
+    assert len(written) == 3 * CARDS
+
+
+def test_items_without_a_title_are_dropped():
+    engine = StubEngine(pages=1)
+    written = []
+
+    async def untitled(html: str) -> list[dict]:
+        return [{"title": "  Byt 2+kk  "}, {"title": " "}, {}]
+
+    async def write(batch):
+        written.extend(batch)
+
+    asyncio.run(CrawlPipeline(engine.pages(), untitled, write).run())
+    assert written == [{"title": "Byt 2+kk"}]
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+import uuid
+
+import pytest
+
+from api_server.cache import LRUTTLCache
+from app.model.models.models import Crawl, Domain, RealEstateRecord, Site
+
+# Ties on published_at, and a NULL tail longer than a page
+PUBLISHED = [
+    datetime(2026, 10, 18),
+    datetime(2026, 10, 18),
+    None,
+    datetime(2026, 10, 17),
+    None,
+    datetime(2026, 10, 18),
+    None,
+    datetime(2026, 10, 1),
+    None,
+    None,
+]
+
+
+@pytest.mark.parametrize("page_size", [1, 2, 3, 4, 10])
+def test_pages_cover_every_record_once_in_order(run, api, monkeypatch, page_size):
+    from app.model.session import aget_session
+
+    # Pages of a previous, rolled back run must not be served
+    monkeypatch.setattr(api, "query_cache", LRUTTLCache(100, timedelta(hours=1)))
+    title = f"keyset-{uuid.uuid4()}"
+
+    async def main():
+        async with aget_session() as session:
+            site = Site(url="https://keyset.test", domain=Domain(url="keyset.test"))
+            crawl = Crawl(site=site)
+            records = [
+                RealEstateRecord(title=title, published_at=published_at, crawl=crawl)
+                for published_at in PUBLISHED
+            ]
+            session.add_all(records)
+            await session.flush()
+
+            expected = sorted(
+                records,
+                key=lambda r: (r.published_at is not None, r.published_at, r.id),
+                reverse=True,
+            )
+            pages, cursor = [], None
+            while True:
+                query = api.PagedQuery(title=title, page_size=page_size, cursor=cursor)
+                page = await api.query_records(query, session)
+                pages.append([record.id for record in page.items])
+                if (cursor := page.next_cursor) is None:
+                    break
+                # A cursor which does not move on would page forever
+                assert len(pages) <= len(PUBLISHED)
+            await session.rollback()
+        return pages, [record.id for record in expected]
+
+    pages, expected = run(main)
+    assert [record_id for page in pages for record_id in page] == expected
+    assert all(len(page) == page_size for page in pages[:-1])
+    assert 1 <= len(pages[-1]) <= page_size
@@ -0,0 +1,127 @@
+from functools import partial
+import asyncio
+
+import pytest
+
+from app.domain.crawler.engines import _same_site, _site
+from app.domain.crawler.registry import CrawlerRegistry, SiteCrawler, crawler_registry
+
+
+class FakeParser:
+    @staticmethod
+    def is_complete(html: str) -> bool:
+        return True
+
+
+class FakeEngine:
+    closed = 0
+
+    def __init__(self, is_complete=None):
+        self.is_complete = is_complete
+
+    @classmethod
+    async def shutdown(cls):
+        cls.closed += 1
+
+
+class OtherEngine(FakeEngine):
+    closed = 0
+
+
+class PlainEngine:
+    pass
+
+
+def crawler(engine: str = "FakeEngine") -> SiteCrawler:
+    return SiteCrawler(parser=f"{__name__}:FakeParser", engine=f"{__name__}:{engine}")
+
+
+@pytest.fixture
+def registry():
+    registry = CrawlerRegistry()
+    registry.register("example.co.uk", site := crawler())
+    registry.register("www.example.co.uk", www := crawler())
+    registry.register("www.example.co.uk:8080", local := crawler())
+    return registry, site, www, local
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://www.example.co.uk:8080/search", "local"),
+        ("https://www.example.co.uk/search", "www"),
+        ("www.example.co.uk", "www"),
+        ("https://shop.example.co.uk/", "site"),
+        ("https://a.b.example.co.uk/", "site"),
+        ("example.co.uk", "site"),
+    ],
+)
+def test_most_specific_registration_wins(registry, url, expected):
+    registry, site, www, local = registry
+    assert registry.get(url) is {"site": site, "www": www, "local": local}[expected]
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://www.example.co.uk:8080/search", "www.example.co.uk"),
+        ("https://www.example.co.uk/search", "www.example.co.uk"),
+        ("https://shop.example.co.uk/", "example.co.uk"),
+    ],
+)
+def test_domain_is_the_matched_registration(registry, url, expected):
+    assert registry[0].domain(url) == expected
+
+
+def test_pages_of_unregistered_sites_are_their_own_site():
+    assert _site("https://www.bezrealitky.cz/vyhledat") == "bezrealitky.cz"
+    assert _site("https://www.foo.co.uk/") == "www.foo.co.uk"
+    assert _same_site("https://static.bezrealitky.cz/app.js", "bezrealitky.cz")
+    assert not _same_site("https://cdn.bar.co.uk/app.js", "www.foo.co.uk")
+    assert not _same_site("https://notbezrealitky.cz/app.js", "bezrealitky.cz")
+
+
+@pytest.mark.parametrize(
+    "url", ["https://other.co.uk/", "https://co.uk/", "https://uk/", "", "not a url"]
+)
+def test_unknown_sites_raise_lookup_error(registry, url):
+    with pytest.raises(LookupError):
+        registry[0].get(url)
+
+
+def test_bezrealitky_is_registered():
+    site = crawler_registry.get("https://www.bezrealitky.cz/vyhledat?page=2")
+    assert site.parser_cls.__name__ == "BezRealitkyParser"
+
+
+def test_engine_gets_the_completeness_check_when_it_takes_one():
+    factory = crawler().make_engine()
+    assert isinstance(factory, partial)
+    assert factory().is_complete is FakeParser.is_complete
+    assert crawler("PlainEngine").make_engine() is PlainEngine
+
+
+def test_shutdown_closes_only_used_engines_once():
+    FakeEngine.closed = OtherEngine.closed = 0
+    registry = CrawlerRegistry()
+    registry.register("a.example", used := crawler())
+    registry.register("b.example", shared := crawler())
+    registry.register("c.example", crawler("OtherEngine"))
+
+    used.make_engine()
+    shared.make_engine()
+    asyncio.run(registry.shutdown())
+
+    assert FakeEngine.closed == 1  # Engines share their pools
+    assert OtherEngine.closed == 0  # Never used, so never imported
+
+
+def test_check_imports_every_reference_without_using_them():
+    registry = CrawlerRegistry()
+    registry.register("a.example", site := crawler())
+    registry.check()
+    assert "engine_cls" not in site.__dict__  # Shut down only once used
+
+    registry.register("b.example", crawler("MissingEngine"))
+    with pytest.raises(AttributeError):
+        registry.check()
@@ -0,0 +1,103 @@
+from pathlib import Path
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+
+from app.domain.crawler.engines import FetchResult
+from app.domain.crawler.parsers import BezRealitkyParser
+from app.model.models.models import Crawl, CrawlPage, Domain, Site, Snapshot
+from app.service.snapshots import (
+    compress,
+    content_hash,
+    decompress,
+    iter_snapshots,
+    store_snapshot,
+)
+
+FIXTURES = sorted((Path(__file__).parent / "fixtures").glob("*.html"))
+PAGE = FIXTURES[0]
+
+
+class StoredPages:
+    """Session streaming the (url, status, data) rows iter_snapshots selects."""
+
+    def __init__(self, rows: list[tuple[str, int, bytes]]):
+        self.rows = rows
+
+    async def stream(self, stmt):
+        return self._rows()
+
+    async def _rows(self):
+        for row in self.rows:
+            yield row
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=lambda path: path.name)
+def test_snapshot_is_addressed_by_its_content(path):
+    raw = path.read_bytes()
+    data = compress(raw)
+
+    assert decompress(data) == raw.decode()
+    assert len(data) < len(raw)
+    # The same page is stored once, any change makes a new snapshot
+    assert content_hash(raw) == content_hash(path.read_bytes())
+    assert compress(raw) == data
+    assert content_hash(raw + b" ") != content_hash(raw)
+
+
+def test_replay_parses_the_stored_bytes():
+    html = PAGE.read_text(encoding="utf-8")
+    rows = [
+        ("https://www.bezrealitky.cz/vyhledat?page=1", 200, compress(html.encode())),
+        ("https://www.bezrealitky.cz/vyhledat?page=2", 200, compress(b"")),
+    ]
+
+    async def main():
+        return [page async for page in iter_snapshots(StoredPages(rows), crawl_id=1)]
+
+    first, second = asyncio.run(main())
+    assert (first.url, first.status, first.engine) == (rows[0][0], 200, "snapshot")
+    assert first.bytes_received == len(rows[0][2])
+    assert BezRealitkyParser.parse(first.html) == BezRealitkyParser.parse(html)
+    assert BezRealitkyParser.parse(first.html)
+    assert second.html == ""
+
+
+def test_stored_pages_share_a_snapshot(run):
+    from app.model.session import aget_session
+
+    html = PAGE.read_text(encoding="utf-8")
+    # Unique, so no snapshot of an earlier run is found
+    html += f"<!-- {uuid.uuid4()} -->"
+    page = FetchResult(url="https://snapshots.test/?page=1", html=html, status=200)
+
+    async def main():
+        async with aget_session() as session:
+            site = Site(
+                url="https://snapshots.test", domain=Domain(url="snapshots.test")
+            )
+            first, second = Crawl(site=site), Crawl(site=site)
+            session.add_all([first, second])
+            await session.flush()
+
+            await store_snapshot(session, first.id, page)
+            await store_snapshot(session, second.id, page)
+            digest = content_hash(html.encode())
+            snapshots = await session.scalar(
+                select(func.count()).where(Snapshot.content_hash == digest)
+            )
+            links = await session.scalar(
+                select(func.count(func.distinct(CrawlPage.snapshot_id))).where(
+                    CrawlPage.crawl_id.in_([first.id, second.id])
+                )
+            )
+            replayed = [page async for page in iter_snapshots(session, second.id)]
+            await session.rollback()
+        return snapshots, links, replayed
+
+    snapshots, links, replayed = run(main)
+    assert (snapshots, links) == (1, 1)
+    assert [page.html for page in replayed] == [html]
+    assert BezRealitkyParser.parse(replayed[0].html) == BezRealitkyParser.parse(html)
@@ -0,0 +1,193 @@
+from datetime import timedelta
+import asyncio
+import math
+
+import pytest
+
+from app.domain.crawler.throttling import (
+    BLOCKED_RATE,
+    MIN_RATE,
+    RATE_RECOVERY,
+    DomainThrottle,
+    RatePolicy,
+)
+
+DOMAIN = "www.bezrealitky.cz"
+URL = f"https://{DOMAIN}/vyhledat"
+
+
+class FakeClock:
+    """Time which passes only by sleeping, so delays are exact."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps: list[float] = []
+
+    def time(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def throttle(clock):
+    def throttle(policy: RatePolicy, workers: int = 1) -> DomainThrottle:
+        domain_throttle = DomainThrottle(
+            workers=workers, clock=clock.time, sleep=clock.sleep
+        )
+        domain_throttle.set_policy(DOMAIN, policy)
+        return domain_throttle
+
+    return throttle
+
+
+async def requests(domain_throttle: DomainThrottle, count: int):
+    for _ in range(count):
+        async with domain_throttle.slot(URL):
+            pass
+
+
+def test_bucket_spaces_requests_by_the_rate(throttle, clock):
+    domain_throttle = throttle(RatePolicy(max_rps=20, burst=1))
+    # The first request takes the initial token, each next one waits 50 ms
+    asyncio.run(requests(domain_throttle, 5))
+    assert clock.sleeps == pytest.approx([0.05] * 4)
+
+
+def test_burst_starts_at_once(throttle, clock):
+    domain_throttle = throttle(RatePolicy(max_rps=2, burst=4))
+    asyncio.run(requests(domain_throttle, 4))
+    assert clock.sleeps == []
+    asyncio.run(requests(domain_throttle, 1))
+    assert clock.sleeps == pytest.approx([0.5])
+
+
+def test_concurrency_is_limited(throttle):
+    domain_throttle = throttle(RatePolicy(max_rps=math.inf, max_concurrency=2))
+    running = peak = 0
+
+    async def request():
+        nonlocal running, peak
+        async with domain_throttle.slot(URL):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    async def main():
+        await asyncio.gather(*(request() for _ in range(6)))
+
+    asyncio.run(main())
+    assert peak == 2
+
+
+def test_block_pauses_and_halves_the_rate(throttle, clock):
+    policy = RatePolicy(max_rps=10, backoff=timedelta(seconds=0.2))
+    domain_throttle = throttle(policy)
+    domain_throttle.record(URL, blocked=True)
+    assert domain_throttle.rate(DOMAIN) == 5
+
+    asyncio.run(requests(domain_throttle, 2))
+    # The pause refills the bucket at the halved rate, the next token takes 0.2 s
+    assert clock.sleeps == pytest.approx([0.2, 0.2])
+
+
+def test_backoff_doubles_on_repeated_blocks_up_to_the_maximum(throttle, clock):
+    policy = RatePolicy(
+        max_rps=10,
+        backoff=timedelta(seconds=1),
+        max_backoff=timedelta(seconds=3),
+    )
+    domain_throttle = throttle(policy)
+    limiter = domain_throttle._limiter(DOMAIN)
+
+    pauses = []
+    for _ in range(4):
+        domain_throttle.record(URL, blocked=True)
+        pauses.append(limiter.paused_until - clock.now)
+    assert pauses == [1, 2, 3, 3]
+    assert domain_throttle.rate(DOMAIN) == 10 * 0.5**4
+
+
+def test_success_ends_the_backoff_streak(throttle, clock):
+    policy = RatePolicy(max_rps=10, backoff=timedelta(seconds=1))
+    domain_throttle = throttle(policy)
+    limiter = domain_throttle._limiter(DOMAIN)
+
+    domain_throttle.record(URL, blocked=True)
+    domain_throttle.record(URL, blocked=True)
+    asyncio.run(requests(domain_throttle, 1))
+    assert clock.sleeps[0] == 2
+    domain_throttle.record(URL, blocked=False)
+    domain_throttle.record(URL, blocked=True)
+    assert limiter.paused_until - clock.now == 1
+
+
+def test_rate_never_drops_below_the_minimum(throttle):
+    domain_throttle = throttle(RatePolicy(max_rps=0.02, backoff=timedelta(0)))
+    for _ in range(5):
+        domain_throttle.record(URL, blocked=True)
+    assert domain_throttle.rate(DOMAIN) == MIN_RATE
+
+
+def test_successes_recover_the_rate_step_by_step(throttle):
+    domain_throttle = throttle(RatePolicy(max_rps=10, backoff=timedelta(0)))
+    domain_throttle.record(URL, blocked=True)
+
+    rates = []
+    for _ in range(12):
+        domain_throttle.record(URL, blocked=False)
+        rates.append(domain_throttle.rate(DOMAIN))
+    assert rates[:3] == pytest.approx([5.5, 6, 6.5])
+    assert rates[-3:] == [10, 10, 10]
+
+
+def test_unlimited_domain_recovers_gradually(throttle):
+    domain_throttle = throttle(RatePolicy(max_rps=math.inf, backoff=timedelta(0)))
+    domain_throttle.record(URL, blocked=True)
+    assert domain_throttle.rate(DOMAIN) == BLOCKED_RATE / 2
+
+    steps = round(BLOCKED_RATE / 2 / (BLOCKED_RATE * RATE_RECOVERY))
+    for _ in range(steps - 1):
+        domain_throttle.record(URL, blocked=False)
+        assert math.isfinite(domain_throttle.rate(DOMAIN))
+    domain_throttle.record(URL, blocked=False)
+    assert domain_throttle.rate(DOMAIN) == math.inf
+
+
+def test_workers_share_the_policy(throttle, clock):
+    domain_throttle = throttle(RatePolicy(max_rps=6, max_concurrency=4), workers=3)
+    limiter = domain_throttle._limiter(DOMAIN)
+    assert domain_throttle.rate(DOMAIN) == 2
+    assert limiter.policy.max_concurrency == 1
+    asyncio.run(requests(domain_throttle, 3))
+    assert clock.sleeps == pytest.approx([0.5, 0.5])
+
+    default = DomainThrottle(delay=timedelta(seconds=1), workers=2)
+    assert default.rate("other.example") == 0.5
+
+
+def test_new_policy_keeps_a_slow_down(throttle):
+    domain_throttle = throttle(RatePolicy(max_rps=10, backoff=timedelta(0)))
+    domain_throttle.record(URL, blocked=True)
+
+    domain_throttle.set_policy(DOMAIN, RatePolicy(max_rps=20))
+    assert domain_throttle.rate(DOMAIN) == 5
+    domain_throttle.set_policy(DOMAIN, RatePolicy(max_rps=2))
+    assert domain_throttle.rate(DOMAIN) == 2
+
+
+@pytest.mark.parametrize(
+    "policy", [RatePolicy(max_rps=0), RatePolicy(max_concurrency=0)]
+)
+def test_invalid_policies_are_rejected(policy):
+    with pytest.raises(ValueError):
+        DomainThrottle().set_policy(DOMAIN, policy)
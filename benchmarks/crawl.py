@@ -0,0 +1,173 @@
+"""Benchmark a full crawl -> parse -> store run against a throwaway database.
+
+Usage: python -m benchmarks.crawl [--pages 50] [--cards 20] [--runs 2]
+       [--politeness-delay 0] [--output results.json]
+
+Fixture pages are served by a local HTTP server and crawled by run_crawl into
+a temporary database, created on the server configured in .env, migrated to
+head and dropped afterwards. The first run stores every listing, the later
+ones recrawl the same, unchanged pages. Prints JSON with pages/s, records/s,
+peak RSS and per-stage totals and p50/p95 latency, meant to be compared
+across commits.
+"""
+
+from pathlib import Path
+from urllib.parse import urlparse
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import time
+import uuid
+
+from alembic import command
+from alembic.config import Config
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from benchmarks.query_load import percentile
+from benchmarks.server import fixture_server
+
+ROOT = Path(__file__).parent.parent
+
+
+def peak_rss_mb(who: int) -> float:
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+def server_url(database: str) -> URL:
+    return URL.create(
+        drivername="postgresql+asyncpg",
+        username=os.getenv("POSTGRES_USER"),
+        password=os.getenv("POSTGRES_PASSWORD"),
+        host=os.getenv("POSTGRES_HOST"),
+        port=int(os.getenv("POSTGRES_PORT")),
+        database=database,
+    )
+
+
+async def execute_on_server(database: str, statement: str):
+    # Databases are created and dropped outside of a transaction
+    engine = create_async_engine(server_url(database), isolation_level="AUTOCOMMIT")
+    async with engine.connect() as connection:
+        await connection.execute(text(statement))
+    await engine.dispose()
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(stats, duration: float) -> dict:
+    return {
+        "seconds": duration,
+        "pages": stats.pages,
+        "skipped_pages": stats.skipped,
+        "records": stats.records,
+        "errors": stats.errors,
+        "bytes_fetched": stats.bytes_fetched,
+        "pages_per_second": stats.pages / duration,
+        "records_per_second": stats.records / duration,
+        # Stages run concurrently, their totals add up to more than `seconds`
+        "stages": {
+            stage: {
+                "seconds": seconds,
+                "ms_per_page": seconds / stats.pages * 1000 if stats.pages else None,
+                # Per call: a page, or a batch for writes
+                "calls": len(samples := stats.samples[stage]),
+                "p50_ms": percentile(samples, 50) * 1000,
+                "p95_ms": percentile(samples, 95) * 1000,
+            }
+            for stage, seconds in sorted(stats.timings.items())
+        },
+    }
+
+
+async def crawl_fixtures(pages: int, cards: int, runs: int) -> list[dict]:
+    # Imported here, the app reads the database and throttle settings on import
+    from app.domain.crawler.executors import get_parse_executor
+    from app.domain.crawler.registry import crawler_registry
+    from app.main import run_crawl
+    from app.model.session import engine
+    from app.service.stats import stats_refresher
+
+    results = []
+    with fixture_server(pages, cards) as url:
+        # Fixture pages mimic bezrealitky
+        crawler_registry.register(
+            urlparse(url).netloc, crawler_registry.get("bezrealitky.cz")
+        )
+        try:
+            for _ in range(runs):
+                start = time.perf_counter()
+                if (stats := await run_crawl(url)) is None:
+                    raise SystemExit(f"Crawling {url} is not allowed by a regulation")
+                results.append(report(stats, time.perf_counter() - start))
+        finally:
+            await stats_refresher.shutdown()
+            await crawler_registry.shutdown()
+            await get_parse_executor().shutdown()
+            await engine.dispose()
+    return results
+
+
+def main(pages: int, cards: int, runs: int, delay: float, output: str | None):
+    load_dotenv()
+    configured = os.getenv("POSTGRES_DB")
+    database = f"snatchy_bench_{uuid.uuid4().hex[:8]}"
+    asyncio.run(execute_on_server(configured, f"CREATE DATABASE {database}"))
+    try:
+        os.environ["POSTGRES_DB"] = database
+        os.environ["CRAWL_POLITENESS_DELAY"] = str(delay)
+        command.upgrade(Config(str(ROOT / "alembic.ini")), "head")
+        runs = asyncio.run(crawl_fixtures(pages, cards, runs))
+    finally:
+        asyncio.run(
+            execute_on_server(configured, f"DROP DATABASE {database} WITH (FORCE)")
+        )
+
+    result = json.dumps(
+        {
+            "commit": git_commit(),
+            "pages": pages,
+            "cards": cards,
+            "runs": runs,
+            "peak_rss_mb": {
+                "self": peak_rss_mb(resource.RUSAGE_SELF),
+                "children": peak_rss_mb(resource.RUSAGE_CHILDREN),
+            },
+        },
+        indent=2,
+    )
+    print(result)
+    if output is not None:
+        Path(output).write_text(result + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--cards", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=2)
+    parser.add_argument(
+        "--politeness-delay",
+        type=float,
+        default=0.0,
+        help="Seconds between requests, the crawler waits 1 by default",
+    )
+    parser.add_argument("--output", help="Also write the JSON to this file")
+    args = parser.parse_args()
+    main(args.pages, args.cards, args.runs, args.politeness_delay, args.output)
@@ -0,0 +1,111 @@
+"""Offline bezrealitky-like results pages used by the benchmarks.
+
+Pages are generated with the same markup the parsers look for, so they can
+be produced in any size without hitting the real site. Recorded pages placed
+in benchmarks/fixtures/*.html are used instead when present.
+"""
+
+from pathlib import Path
+import json
+import random
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+STREETS = [
+    "Vinohradská",
+    "Dělnická",
+    "Na Příkopě",
+    "Korunní",
+    "Žitná",
+    "Milady Horákové",
+]
+
+CARD = """
+<article class="PropertyCard_propertyCard__moO_5">
+  <div class="PropertyCard_propertyCardContent__osPAM">
+    <h2 class="PropertyCard_propertyCardHeadline__y3bhA">
+      <a href="https://www.bezrealitky.cz/nemovitosti-byty-domy/{offer_id}-nabidka-prodej-bytu-{slug}">
+        <span class="PropertyCard_propertyCardLabel__9Q2vC">Prodej bytu {layout} {area} m²</span>
+        <span class="PropertyCard_propertyCardAddress__hNqyR">{street}, Praha - {district}</span>
+      </a>
+    </h2>
+    <ul class="FeaturesList_featuresList__75Wet"><li>{area} m²</li><li>{layout}</li></ul>
+    <div class="PropertyPrice_propertyPrice__lthza">
+      <span class="PropertyPrice_propertyPriceAmount__WdEE1">{price} Kč</span>
+      <span class="PropertyPrice_propertyPricePerMeter__IfhGa">{ppm} Kč/m²</span>
+    </div>
+    <img src="/_next/image?url=photo-{offer_id}.jpg" alt="">
+  </div>
+</article>
+"""
+
+
+def next_data(adverts: list[dict]) -> str:
+    """Embedded Next.js state with an Apollo cache, as bezrealitky renders it."""
+    cache = {f"Advert:{advert['id']}": advert for advert in adverts}
+    state = {"props": {"pageProps": {"apolloCache": cache}}, "page": "/vyhledat"}
+    return (
+        '<script id="__NEXT_DATA__" type="application/json">'
+        + json.dumps(state, ensure_ascii=False)
+        + "</script>"
+    )
+
+
+def results_page(
+    page: int = 1,
+    pages: int = 10,
+    cards: int = 20,
+    seed: int = 0,
+    with_next_data: bool = True,
+) -> str:
+    rnd = random.Random(seed * 100_000 + page)
+    items, adverts = [], []
+    for i in range(cards):
+        area = rnd.randint(20, 140)
+        ppm = rnd.randint(90_000, 180_000)
+        street = rnd.choice(STREETS)
+        district = rnd.randint(1, 10)
+        offer_id = 900_000 + page * 1000 + i
+        adverts.append(
+            {
+                "__typename": "Advert",
+                "id": str(offer_id),
+                "uri": f"{offer_id}-nabidka-prodej-bytu-praha",
+                'address({"locale":"CS"})': f"{street}, Praha - {district}",
+                "surface": area,
+                "price": area * ppm,
+                "currency": "CZK",
+                "cityDistrict": f"Praha {district}",
+            }
+        )
+        items.append(
+            CARD.format(
+                offer_id=offer_id,
+                slug="praha",
+                layout=rnd.choice(["1+kk", "2+kk", "3+1", "4+kk"]),
+                area=area,
+                street=street,
+                district=district,
+                price=f"{area * ppm:,}".replace(",", " "),
+                ppm=f"{ppm:,}".replace(",", " "),
+            )
+        )
+    pagination = "".join(
+        f'<a href="/vyhledat?offerType=PRODEJ&amp;page={n}">{n}</a>'
+        for n in range(1, pages + 1)
+    )
+    return (
+        '<!DOCTYPE html><html lang="cs"><head><meta charset="utf-8">'
+        "<title>Byty na prodej Praha</title></head><body><main>"
+        + "".join(items)
+        + f'<nav class="pagination">{pagination}</nav></main>'
+        + (next_data(adverts) if with_next_data else "")
+        + "</body></html>"
+    )
+
+
+def load_pages(count: int = 10, cards: int = 20) -> list[str]:
+    """Recorded fixtures if there are any, otherwise generated pages."""
+    if recorded := sorted(FIXTURES_DIR.glob("*.html")):
+        return [path.read_text(encoding="utf-8") for path in recorded]
+    return [results_page(page, count, cards) for page in range(1, count + 1)]
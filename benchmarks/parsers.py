@@ -0,0 +1,67 @@
+"""Parser backend microbenchmark with a parity check.
+
+Usage: python -m benchmarks.parsers [--pages 10] [--repeat 5]
+
+Every available backend parses the same fixture pages; the run fails if any
+backend returns different items than BeautifulSoup. The embedded JSON reader
+is checked on the fields both sources carry.
+"""
+
+import argparse
+import time
+
+from app.domain.crawler.parsers import (
+    BACKENDS,
+    Bs4Backend,
+    lxml_html,
+    parse_next_data,
+)
+from benchmarks.fixtures import load_pages
+
+SHARED_FIELDS = ("title", "price", "currency", "description")
+
+
+def parse(backend, html: str) -> list[dict]:
+    return [backend.parse_card(card) for card in backend.cards(html)]
+
+
+def comparable(items: list[dict] | None) -> list[tuple]:
+    return [
+        tuple(item[field] for field in SHARED_FIELDS)
+        + (round(item["flooring_m_squared"] or 0, 1),)
+        for item in items or []
+    ]
+
+
+def report(name: str, parse_page, documents: list[str], repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        cards = sum(len(parse_page(html) or []) for html in documents)
+    elapsed = time.perf_counter() - start
+    print(f"{name:>9}: {cards * repeat / elapsed:>10.0f} cards/s")
+
+
+def main(pages: int, repeat: int):
+    documents = load_pages(pages)
+    expected = [parse(Bs4Backend, html) for html in documents]
+    backends = [b for b in BACKENDS.values() if b is Bs4Backend or lxml_html]
+
+    for backend in backends:
+        results = [parse(backend, html) for html in documents]
+        if results != expected:
+            raise SystemExit(f"Backend {backend.name} differs from {Bs4Backend.name}")
+        report(backend.name, lambda html: parse(backend, html), documents, repeat)
+
+    if any(parse_next_data(html) for html in documents):
+        results = [comparable(parse_next_data(html)) for html in documents]
+        if results != [comparable(items) for items in expected]:
+            raise SystemExit("Embedded JSON differs from the rendered cards")
+        report("next_data", parse_next_data, documents, repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.pages, args.repeat)
@@ -0,0 +1,54 @@
+"""Local HTTP server serving fixture results pages, so benchmarks stay offline."""
+
+from contextlib import contextmanager
+from hashlib import md5
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import threading
+
+from benchmarks.fixtures import load_pages
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    pages: list[bytes] = []
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        number = int(query.get("page", ["1"])[0])
+        if not 1 <= number <= len(self.pages):
+            self.send_error(404)
+            return
+        body = self.pages[number - 1]
+        etag = f'"{md5(body).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def fixture_server(pages: int = 10, cards: int = 20):
+    """Serve fixture pages, yields the URL of the first results page."""
+    handler = type(
+        "Handler",
+        (FixtureHandler,),
+        {"pages": [html.encode() for html in load_pages(pages, cards)]},
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}/vyhledat?offerType=PRODEJ"
+    finally:
+        server.shutdown()
+        server.server_close()